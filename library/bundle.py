@@ -0,0 +1,156 @@
+import json
+import struct
+from os import listdir, stat, path as paths
+
+from library.exceptions import ResourceLoadingError
+
+
+def collect_sources(root, directories):
+    sources = {}
+    for directory in directories:
+        for file_name in sorted(listdir(directory)):
+            path = paths.join(directory, file_name)
+            source_stat = stat(path)
+            sources[paths.relpath(path, root)] = (source_stat.st_size, source_stat.st_mtime_ns)
+    return sources
+
+
+def _normalize(value):
+    # bundle metadata is stored as json, tuples come back as lists
+    return json.loads(json.dumps(value))
+
+
+class _BlobWriter:
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, chunk):
+        ref = (self.size, len(chunk))
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        return ref
+
+
+class _BlobReader:
+
+    def __init__(self, data):
+        self._data = data
+
+    def get(self, ref):
+        offset, length = ref
+        if offset < 0 or length < 0 or offset + length > len(self._data):
+            raise ValueError('Blob out of range')
+        return bytes(self._data[offset:offset + length])
+
+
+class ResourceBundle:
+
+    magic = b'PMRB'
+    version = 2
+
+    # magic, version, metadata length, blob length
+    _header = struct.Struct('<4sHQQ')
+
+    def __init__(self, sources, settings, grids=None, textures=None, tints=None,
+                 animations=None, sounds=None):
+        self.sources = sources
+        self.settings = settings
+        self.grids = grids if grids is not None else {}
+        # name: (mode, tile size, raw tile bytes)
+        self.textures = textures if textures is not None else {}
+        # (name, color): (mode, tile size, raw tile bytes)
+        self.tints = tints if tints is not None else {}
+        # name: json text
+        self.animations = animations if animations is not None else {}
+        # name: (frames, channels, sample width, frame rate)
+        self.sounds = sounds if sounds is not None else {}
+
+    def is_valid(self, sources, settings):
+        return (
+            _normalize(self.sources) == _normalize(sources)
+            and _normalize(self.settings) == _normalize(settings)
+        )
+
+    @staticmethod
+    def _pack_images(blobs, images):
+        mode, size, tiles = images
+        return [mode, list(size), [blobs.add(tile) for tile in tiles]]
+
+    @staticmethod
+    def _unpack_images(blobs, images):
+        mode, size, tiles = images
+        return str(mode), (int(size[0]), int(size[1])), [blobs.get(tile) for tile in tiles]
+
+    def to_bytes(self):
+        blobs = _BlobWriter()
+        metadata = json.dumps({
+            'sources': self.sources,
+            'settings': self.settings,
+            'grids': self.grids,
+            'textures': {
+                name: self._pack_images(blobs, images)
+                for name, images in self.textures.items()
+            },
+            'tints': [
+                [name, list(color), self._pack_images(blobs, images)]
+                for (name, color), images in self.tints.items()
+            ],
+            'animations': self.animations,
+            'sounds': {
+                name: [blobs.add(frames), channels, sample_width, frame_rate]
+                for name, (frames, channels, sample_width, frame_rate) in self.sounds.items()
+            }
+        }).encode()
+        return b''.join((
+            self._header.pack(self.magic, self.version, len(metadata), blobs.size),
+            metadata,
+            *blobs.chunks
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, version, metadata_length, blobs_length = cls._header.unpack_from(data)
+            if magic != cls.magic or version != cls.version:
+                raise ResourceLoadingError(False, message='Unsupported resource bundle format')
+            position = cls._header.size
+            if len(data) != position + metadata_length + blobs_length:
+                raise ResourceLoadingError(False, message='Truncated resource bundle')
+            metadata = json.loads(data[position:position + metadata_length])
+            blobs = _BlobReader(memoryview(data)[position + metadata_length:])
+            return cls(
+                metadata['sources'],
+                metadata['settings'],
+                {name: [str(line) for line in lines] for name, lines in metadata['grids'].items()},
+                {
+                    name: cls._unpack_images(blobs, images)
+                    for name, images in metadata['textures'].items()
+                },
+                {
+                    (name, tuple(color)): cls._unpack_images(blobs, images)
+                    for name, color, images in metadata['tints']
+                },
+                {name: str(text) for name, text in metadata['animations'].items()},
+                {
+                    name: (blobs.get(frames), int(channels), int(sample_width), int(frame_rate))
+                    for name, (frames, channels, sample_width, frame_rate)
+                    in metadata['sounds'].items()
+                }
+            )
+        except (struct.error, UnicodeDecodeError, ValueError, TypeError, KeyError, AttributeError):
+            raise ResourceLoadingError(False, message='Corrupted resource bundle')
+
+    def write(self, path):
+        with open(path, 'wb') as bundle_file:
+            bundle_file.write(self.to_bytes())
+
+    @classmethod
+    def read(cls, path):
+        try:
+            with open(path, 'rb') as bundle_file:
+                data = bundle_file.read()
+        except OSError:
+            raise ResourceLoadingError(False, message=f'Can\'t read resource bundle {path}')
+        return cls.from_bytes(data)
@@ -0,0 +1,157 @@
+import logging
+import sys
+from collections import OrderedDict
+
+from library.config import AbstractConfig
+
+
+def estimate_size(value, depth=4):
+    size = sys.getsizeof(value)
+    if depth == 0 or isinstance(value, (str, bytes, bytearray, memoryview)):
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(key, depth - 1) + estimate_size(item, depth - 1)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, depth - 1) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), depth - 1)
+    return size
+
+
+class CacheStats:
+
+    __slots__ = ('name', 'entries', 'size', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name, entries, size, hits, misses, evictions):
+        self.name = name
+        self.entries = entries
+        self.size = size
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0
+
+    def __str__(self):
+        return (
+            f'{self.name}: {self.entries} entries, {self.size / 1024:.1f} KiB, '
+            f'{self.hits} hits, {self.misses} misses, {self.evictions} evictions'
+        )
+
+
+class AbstractCache:
+
+    def __init__(self, name, sizeof=None):
+        self.name = name
+        self._sizeof = sizeof or estimate_size
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        if key not in self._entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def __setitem__(self, key, value):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = value
+        self._sizes[key] = self._sizeof(value)
+        self.size += self._sizes[key]
+        while len(self._entries) > 1 and self._is_full():
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def items(self):
+        return self._entries.items()
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.size = 0
+
+    def stats(self):
+        return CacheStats(
+            self.name, len(self._entries), self.size, self.hits, self.misses, self.evictions
+        )
+
+    def _remove(self, key):
+        del self._entries[key]
+        self.size -= self._sizes.pop(key)
+
+    def _is_full(self):
+        return False
+
+
+class UnboundedCache(AbstractCache):
+    pass
+
+
+class LruCache(AbstractCache):
+
+    def __init__(self, name, max_entries, sizeof=None):
+        super().__init__(name, sizeof)
+        self.max_entries = max_entries
+
+    def _is_full(self):
+        return len(self._entries) > self.max_entries
+
+
+class SizedCache(AbstractCache):
+
+    def __init__(self, name, max_bytes, max_entries=None, sizeof=None):
+        super().__init__(name, sizeof)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def _is_full(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.size > self.max_bytes
+
+
+class CacheRegistry:
+
+    def __init__(self, services):
+        self._config = services[AbstractConfig]
+        self._caches = {}
+
+    def create(self, name, sizeof=None):
+        limits = self._config['caches'].get(name, {})
+        if limits.get('max_bytes') is not None:
+            cache = SizedCache(name, limits['max_bytes'], limits.get('max_entries'), sizeof)
+        elif limits.get('max_entries') is not None:
+            cache = LruCache(name, limits['max_entries'], sizeof)
+        else:
+            cache = UnboundedCache(name, sizeof)
+        self._caches[name] = cache
+        return cache
+
+    def __iter__(self):
+        return iter(self._caches.values())
+
+    def stats(self):
+        return [cache.stats() for cache in self._caches.values()]
+
+    def log_stats(self):
+        for stats in self.stats():
+            logging.info(f'Cache {stats}')
@@ -10,6 +10,18 @@ class AbstractInputSource:
         pass
 
 
+class InputSourceNull(AbstractInputSource):
+
+    def __init__(self, services):
+        self._event_dispatcher = services[EventDispatcher]
+
+    def is_pressed(self, control):
+        return False
+
+    def press(self, input_uid):
+        self._event_dispatcher.fire(EventId.CONTROL, self, value=input_uid)
+
+
 class InputSourceTkinter(AbstractInputSource):
 
     def __init__(self, services):
@@ -18,13 +18,40 @@ class SpriteDrawer:
         self._graphics = graphics
         self._canvas = canvas
         self._canvas_id = None
+        self._generation = None
+        self._texture = None
+        self._screen_position = None
+        self._visible = True
+
+    @property
+    def is_drawn(self):
+        return self._canvas_id is not None and self._generation == self._canvas.generation
 
     def draw(self, position, sprite, idx):
         texture = sprite[idx]
-        self.clear()
         screen_position = self._graphics.world_space_to_screen_space(position)
-        self._canvas_id = self._canvas.draw_image(texture, screen_position)
+        if not self.is_drawn:
+            self._canvas_id = self._canvas.draw_image(texture, screen_position)
+            self._generation = self._canvas.generation
+            self._visible = True
+        else:
+            if texture is not self._texture:
+                self._canvas.set_image(self._canvas_id, texture)
+            if screen_position != self._screen_position:
+                self._canvas.move_image(self._canvas_id, screen_position)
+            if not self._visible:
+                self._canvas.set_visible(self._canvas_id, True)
+                self._visible = True
+        self._texture = texture
+        self._screen_position = screen_position
+
+    def hide(self):
+        # keeps the item and its place in the stacking order
+        if self.is_drawn and self._visible:
+            self._canvas.set_visible(self._canvas_id, False)
+            self._visible = False
 
     def clear(self):
-        if self._canvas_id:
+        if self._canvas_id and self._generation == self._canvas.generation:
             self._canvas.clear(self._canvas_id)
+        self._canvas_id = None
@@ -0,0 +1,127 @@
+try:
+    from PIL import Image, ImageDraw
+except ModuleNotFoundError:
+    Image = ImageDraw = None
+
+
+def blit(target, image, x, y):
+    x = int(x)
+    y = int(y)
+    if x >= target.width or y >= target.height or x <= -image.width or y <= -image.height:
+        return
+    source = (
+        max(-x, 0), max(-y, 0),
+        min(image.width, target.width - x), min(image.height, target.height - y)
+    )
+    target.alpha_composite(image, (max(x, 0), max(y, 0)), source)
+
+
+class Framebuffer:
+
+    def __init__(self, size=(1, 1), background=(0, 0, 0, 255)):
+        self.size = size
+        self._background = background
+        self.dirty = True
+        # uid: (image, position) or (None, (from, to, color)), uids grow in stacking order
+        self._items = {}
+        self._hidden = set()
+        self._next_uid = 1
+        # composite of every item below _base_uid, reused while only items above it change
+        self._base = None
+        self._base_uid = 0
+        self._lowest_changed = 0
+
+    @property
+    def background(self):
+        return self._background
+
+    @background.setter
+    def background(self, value):
+        self._background = value
+        self._invalidate(0)
+
+    def resize(self, size):
+        self.size = size
+        self._base = None
+        self._invalidate(0)
+
+    def _invalidate(self, uid):
+        self._lowest_changed = min(self._lowest_changed, uid)
+        self.dirty = True
+
+    def add_image(self, image, position):
+        return self._add((image, (position.x, position.y)))
+
+    def add_line(self, from_, to, color):
+        return self._add((None, ((from_.x, from_.y), (to.x, to.y), color)))
+
+    def _add(self, item):
+        uid = self._next_uid
+        self._next_uid += 1
+        self._items[uid] = item
+        self._invalidate(uid)
+        return uid
+
+    def set_image(self, uid, image):
+        if uid in self._items:
+            self._items[uid] = (image, self._items[uid][1])
+            self._invalidate(uid)
+
+    def move(self, uid, position):
+        if uid in self._items:
+            self._items[uid] = (self._items[uid][0], (position.x, position.y))
+            self._invalidate(uid)
+
+    def set_visible(self, uid, visible):
+        if uid not in self._items or (uid not in self._hidden) == visible:
+            return
+        if visible:
+            self._hidden.discard(uid)
+        else:
+            self._hidden.add(uid)
+        self._invalidate(uid)
+
+    def remove(self, uid):
+        if self._items.pop(uid, None) is not None:
+            self._hidden.discard(uid)
+            self._invalidate(uid)
+
+    def clear(self):
+        self._items.clear()
+        self._hidden.clear()
+        self._invalidate(0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def compose(self):
+        split = self._lowest_changed
+        if self._base is None or split < self._base_uid:
+            self._base = Image.new('RGBA', self.size, self._background)
+            self._base_uid = 0
+        self._draw_items(self._base, self._base_uid, split)
+        self._base_uid = split
+        frame = self._base.copy()
+        self._draw_items(frame, split, self._next_uid)
+        self._lowest_changed = self._next_uid
+        self.dirty = False
+        return frame
+
+    def _draw_items(self, target, begin, end):
+        if begin >= end:
+            return
+        draw = None
+        for uid, (image, data) in self._items.items():
+            if uid < begin:
+                continue
+            if uid >= end:
+                break
+            if uid in self._hidden:
+                continue
+            if image is not None:
+                blit(target, image, *data)
+                continue
+            if draw is None:
+                draw = ImageDraw.Draw(target)
+            from_, to, color = data
+            draw.line((from_, to), fill=color)
@@ -19,11 +19,14 @@ class Vector2:
         if not isinstance(other, type(self)):
             return False
 
-        return math.fabs(self.x - other.x) < 0.01 and math.fabs(self.y - other.y) < 0.01
+        return self.x == other.x and self.y == other.y
 
     def __hash__(self):
         return hash((self.x, self.y))
 
+    def is_close(self, other, epsilon=0.01):
+        return math.fabs(self.x - other.x) < epsilon and math.fabs(self.y - other.y) < epsilon
+
     def __add__(self, other):
         return type(self)(self.x + other.x, self.y + other.y)
 
@@ -80,8 +83,17 @@ class Direction(Enum):
     def get_oppositely(self):
         return Direction((self.value + 180) % 360)
 
+    def to_offset(self):
+        return _direction_offsets[self._value_]
+
     def to_vector(self):
-        return Vector2(
-            int(math.cos(math.radians(self.value))),
-            int(-math.sin(math.radians(self.value)))
-        )
+        return Vector2(*_direction_offsets[self._value_])
+
+
+_direction_offsets = {
+    direction.value: (
+        int(math.cos(math.radians(direction.value))),
+        int(-math.sin(math.radians(direction.value)))
+    )
+    for direction in Direction
+}
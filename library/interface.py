@@ -1,10 +1,19 @@
 import logging
-import tkinter
+
+try:
+    import tkinter
+except ModuleNotFoundError:
+    tkinter = None
+try:
+    from PIL import ImageColor, ImageTk
+except ModuleNotFoundError:
+    ImageColor = ImageTk = None
 
 from os import name as os_name
 
 from library.config import AbstractConfig
 from library.events import EventId, EventDispatcher
+from library.framebuffer import Framebuffer
 from library.model.control import InputUid
 from library.resource_manager import ResourceManager
 from library.time import Stopwatch
@@ -13,7 +22,8 @@ from library.time import Stopwatch
 class AbstractCanvas:
 
     def __init__(self):
-        pass
+        # bumped by clear_all, item ids of older generations are gone
+        self.generation = 0
 
     def set_size(self, size):
         pass
@@ -172,13 +182,186 @@ class CanvasTkinter(AbstractCanvas):
             anchor='nw'
         )
 
+    def set_image(self, uid, image):
+        self._canvas.itemconfigure(uid, image=image)
+
+    def move_image(self, uid, position):
+        self._canvas.coords(uid, position.x, position.y)
+
+    def set_visible(self, uid, visible):
+        self._canvas.itemconfigure(uid, state='normal' if visible else 'hidden')
+
     def clear_all(self):
         self._canvas.delete('all')
+        self.generation += 1
 
     def clear(self, uid):
         self._canvas.delete(uid)
 
 
+class GraphicsFramebuffer(GraphicsTkinter):
+
+    def __init__(self, services):
+        super().__init__(services)
+
+        self._canvases = []
+
+    def create_window(self):
+        window = WindowFramebuffer(self)
+        self._root = window._root
+        return window
+
+    def add_canvas(self, canvas):
+        self._canvases.append(canvas)
+
+    def _update(self):
+        if self._update_callback:
+            self._update_callback()
+        for canvas in self._canvases:
+            canvas.present()
+
+        self._root.after(self._redraw_delay, self._update)
+
+
+class WindowFramebuffer(WindowTkinter):
+
+    def create_canvas(self) -> AbstractCanvas:
+        canvas = CanvasFramebuffer(self._root, self._graphics)
+        self._graphics.add_canvas(canvas)
+        return canvas
+
+
+class CanvasFramebuffer(AbstractCanvas):
+
+    def __init__(self, root, graphics):
+        super().__init__()
+
+        self._canvas = tkinter.Canvas(
+            master=root,
+            highlightthickness=0
+        )
+        self._canvas.pack(side='left')
+
+        self._graphics = graphics
+        self._framebuffer = Framebuffer()
+        self._photo = None
+        self._photo_id = None
+
+    def set_size(self, size):
+        size = (int(size.x), int(size.y))
+        if self._photo and size == self._framebuffer.size:
+            return
+        self._framebuffer.resize(size)
+        self._canvas.config(width=size[0], height=size[1])
+        self._photo = ImageTk.PhotoImage('RGBA', size)
+        if self._photo_id:
+            self._canvas.delete(self._photo_id)
+        self._photo_id = self._canvas.create_image(0, 0, image=self._photo, anchor='nw')
+
+    def set_background_color(self, color):
+        self._canvas.configure(bg=color)
+        self._framebuffer.background = ImageColor.getrgb(color) + (255,)
+
+    def draw_line(self, from_, to, color):
+        return self._framebuffer.add_line(from_, to, color)
+
+    def draw_image(self, image, position):
+        return self._framebuffer.add_image(image, position)
+
+    def set_image(self, uid, image):
+        self._framebuffer.set_image(uid, image)
+
+    def move_image(self, uid, position):
+        self._framebuffer.move(uid, position)
+
+    def set_visible(self, uid, visible):
+        self._framebuffer.set_visible(uid, visible)
+
+    def clear_all(self):
+        self._framebuffer.clear()
+        self.generation += 1
+
+    def clear(self, uid):
+        self._framebuffer.remove(uid)
+
+    def present(self):
+        if self._photo and self._framebuffer.dirty:
+            self._photo.paste(self._framebuffer.compose())
+
+
+class GraphicsNull(AbstractGraphics):
+
+    def __init__(self, services):
+        super().__init__()
+
+        self._event_dispatcher = services[EventDispatcher]
+        self._config = services[AbstractConfig]
+
+        self._running = False
+
+    def world_space_to_screen_space(self, position):
+        return position * self._config['view']['px_per_unit'] * self._config['view']['scale']
+
+    def screen_space_to_world_space(self, position):
+        return position / self._config['view']['px_per_unit'] * self._config['view']['scale']
+
+    def create_window(self):
+        return WindowNull()
+
+    def run(self):
+        self._event_dispatcher.subscribe(EventId.DESTROY, self._on_destroy)
+        self._running = True
+
+        try:
+            while self._running and self._update_callback:
+                self._update_callback()
+        except KeyboardInterrupt:
+            self._on_destroy()
+
+    def stop(self):
+        self._running = False
+
+    def subscribe_on_key_press(self, callback):
+        pass
+
+    def subscribe_on_window_close(self, callback):
+        pass
+
+    def _on_destroy(self, event_args=None):
+        self.stop()
+        logging.info('App terminated')
+
+
+class WindowNull(AbstractWindow):
+
+    def create_canvas(self) -> AbstractCanvas:
+        return CanvasNull()
+
+
+class CanvasNull(AbstractCanvas):
+
+    def draw_line(self, from_, to, color):
+        return None
+
+    def draw_image(self, image, position):
+        return None
+
+    def set_image(self, uid, image):
+        pass
+
+    def move_image(self, uid, position):
+        pass
+
+    def set_visible(self, uid, visible):
+        pass
+
+    def clear_all(self):
+        self.generation += 1
+
+    def clear(self, uid):
+        pass
+
+
 class Interface:
 
     def __init__(self, services):
@@ -224,3 +407,33 @@ class Interface:
 
     def run(self):
         self._graphics.run()
+
+
+class HeadlessInterface:
+
+    def __init__(self, services, max_ticks=None):
+        self._event_dispatcher = services[EventDispatcher]
+        self._graphics = services[AbstractGraphics]
+        self._graphics.subscribe_on_update(self._on_update)
+        self.max_ticks = max_ticks
+        self.tick_count = 0
+
+    def _on_update(self):
+        self._event_dispatcher.fire(EventId.TICK, self, time=self.tick_count)
+        self.tick_count += 1
+        if self.max_ticks is not None and self.tick_count >= self.max_ticks:
+            self._graphics.stop()
+
+    def run(self):
+        stopwatch = Stopwatch()
+        with stopwatch:
+            self._graphics.run()
+        if stopwatch.result_ms > 0:
+            ticks_per_second = self.tick_count * 1000 / stopwatch.result_ms
+        else:
+            ticks_per_second = float('inf')
+        logging.info(
+            f'Headless run finished: {self.tick_count} ticks '
+            f'in {stopwatch.result_ms:.0f} ms ({ticks_per_second:.0f} ticks per second)'
+        )
+        return ticks_per_second
@@ -0,0 +1,112 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from functools import partial
+
+from library.events import EventId
+from library.exceptions import ResourceLoadingError
+
+
+class IoWorker:
+
+    def __init__(self, event_dispatcher):
+        self._event_dispatcher = event_dispatcher
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._writing = None
+        self._completed = deque()
+        self._thread = None
+        self._running = False
+        self._event_dispatcher.subscribe(EventId.TICK, self._on_tick)
+
+    def write(self, path, data, callback=None):
+        self._enqueue(path, partial(self._write, path, data), callback)
+
+    def run(self, task, callback=None):
+        self._enqueue(object(), task, callback)
+
+    def _enqueue(self, key, task, callback):
+        with self._condition:
+            if key in self._pending:
+                _, callbacks = self._pending.pop(key)
+            else:
+                callbacks = []
+            if callback:
+                callbacks.append(callback)
+            self._pending[key] = (task, callbacks)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._working_cycle, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def is_pending(self, path):
+        with self._condition:
+            return path in self._pending or path == self._writing
+
+    def flush(self):
+        with self._condition:
+            while self._pending or self._writing:
+                self._condition.wait()
+        self._dispatch_completed()
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _working_cycle(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                key = next(iter(self._pending))
+                task, callbacks = self._pending.pop(key)
+                self._writing = key
+            error = None
+            try:
+                task()
+            except (OSError, ResourceLoadingError) as exc:
+                logging.error(exc)
+                error = exc
+            with self._condition:
+                self._writing = None
+                self._completed.extend((callback, error) for callback in callbacks)
+                self._condition.notify_all()
+
+    @staticmethod
+    def _write(path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory
+        )
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _on_tick(self, event_args):
+        if self._completed:
+            self._dispatch_completed()
+
+    def _dispatch_completed(self):
+        while self._completed:
+            callback, error = self._completed.popleft()
+            callback(error)
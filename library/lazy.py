@@ -0,0 +1,85 @@
+import logging
+from concurrent.futures import Future
+from enum import Enum
+from threading import Lock
+
+from library.exceptions import ResourceLoadingError
+
+
+class LazyStore:
+
+    class State(Enum):
+        UNKNOWN = 0
+        UNLOADED = 1
+        LOADING = 2
+        LOADED = 3
+        FAILED = 4
+
+    def __init__(self, executor, decode):
+        self._executor = executor
+        self._decode = decode
+        self._paths = {}
+        self._futures = {}
+        self._lock = Lock()
+
+    def __contains__(self, name):
+        return name in self._paths
+
+    def names(self):
+        return self._paths.keys()
+
+    def register(self, name, path):
+        with self._lock:
+            self._paths[name] = path
+            self._futures.pop(name, None)
+
+    def set(self, name, value):
+        future = Future()
+        future.set_result(value)
+        with self._lock:
+            self._paths[name] = None
+            self._futures[name] = future
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._paths:
+                return None
+            future = self._futures.get(name)
+            run = future is None
+            if run:
+                future = self._futures[name] = Future()
+        if run:
+            try:
+                future.set_result(self._run(name))
+            except ResourceLoadingError as exc:
+                future.set_exception(exc)
+        try:
+            return future.result()
+        except ResourceLoadingError:
+            return None
+
+    def prefetch(self, names):
+        with self._lock:
+            for name in names:
+                if name in self._paths and name not in self._futures:
+                    self._futures[name] = self._executor.submit(self._run, name)
+
+    def get_state(self, name):
+        with self._lock:
+            if name not in self._paths:
+                return self.State.UNKNOWN
+            future = self._futures.get(name)
+        if future is None:
+            return self.State.UNLOADED
+        if not future.done():
+            return self.State.LOADING
+        if future.exception() is not None:
+            return self.State.FAILED
+        return self.State.LOADED
+
+    def _run(self, name):
+        try:
+            return self._decode(self._paths[name])
+        except ResourceLoadingError as exc:
+            logging.error(exc)
+            raise
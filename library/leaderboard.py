@@ -0,0 +1,141 @@
+import time
+from collections import defaultdict
+
+try:
+    import sqlite3
+except ModuleNotFoundError:
+    sqlite3 = None
+
+from library.exceptions import ResourceLoadingError
+
+
+class Leaderboard:
+
+    _schema = (
+        '''
+        CREATE TABLE IF NOT EXISTS ratings (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            grid TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            date REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS ratings_score ON ratings (score DESC, id)',
+        '''
+        CREATE INDEX IF NOT EXISTS ratings_board_score
+        ON ratings (grid, difficulty, score DESC, id)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS boards (
+            grid TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (grid, difficulty)
+        )
+        '''
+    )
+
+    def __init__(self, path, retention):
+        if not sqlite3:
+            raise ResourceLoadingError(False, message='SQLite is not found')
+        self.retention = retention
+        self._path = path
+        self._writer = None
+        try:
+            self._connection = sqlite3.connect(path)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            with self._connection:
+                for statement in self._schema:
+                    self._connection.execute(statement)
+        except sqlite3.Error as exc:
+            raise ResourceLoadingError(False, message=f'Can\'t open leaderboard: {exc}')
+
+    def is_empty(self):
+        return self._connection.execute('SELECT 1 FROM ratings LIMIT 1').fetchone() is None
+
+    def add(self, name, score, grid='', difficulty='', level=0):
+        self.add_many(((name, score, grid, difficulty, level),))
+
+    def add_many(self, records):
+        # writes run on the io worker thread, reads stay on the connection
+        # of the thread that opened the leaderboard; WAL lets them overlap
+        now = time.time()
+        boards = defaultdict(int)
+
+        def rows():
+            for name, score, grid, difficulty, level in records:
+                boards[grid, difficulty] += 1
+                yield name, score, grid, difficulty, level, now
+
+        try:
+            if not self._writer:
+                self._writer = sqlite3.connect(self._path, check_same_thread=False)
+                self._writer.execute('PRAGMA synchronous=NORMAL')
+            with self._writer:
+                self._writer.executemany(
+                    'INSERT INTO ratings (name, score, grid, difficulty, level, date) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    rows()
+                )
+                for (grid, difficulty), added in boards.items():
+                    self._writer.execute(
+                        'INSERT INTO boards (grid, difficulty, count) VALUES (?, ?, ?) '
+                        'ON CONFLICT (grid, difficulty) DO UPDATE SET count = count + excluded.count',
+                        (grid, difficulty, added)
+                    )
+                    self._trim(self._writer, grid, difficulty)
+        except sqlite3.Error as exc:
+            raise ResourceLoadingError(False, message=f'Can\'t write leaderboard: {exc}')
+
+    def _trim(self, connection, grid, difficulty):
+        excess = self._count(connection, grid, difficulty) - self.retention
+        if excess <= 0:
+            return
+        connection.execute(
+            'DELETE FROM ratings WHERE id IN ('
+            'SELECT id FROM ratings WHERE grid = ? AND difficulty = ? '
+            'ORDER BY score, id DESC LIMIT ?)',
+            (grid, difficulty, excess)
+        )
+        connection.execute(
+            'UPDATE boards SET count = ? WHERE grid = ? AND difficulty = ?',
+            (self.retention, grid, difficulty)
+        )
+
+    def top(self, grid=None, difficulty=None, limit=10, offset=0):
+        if grid is None:
+            query = (
+                'SELECT name, score FROM ratings '
+                'ORDER BY score DESC, id LIMIT ? OFFSET ?'
+            )
+            args = (limit, offset)
+        else:
+            query = (
+                'SELECT name, score FROM ratings WHERE grid = ? AND difficulty = ? '
+                'ORDER BY score DESC, id LIMIT ? OFFSET ?'
+            )
+            args = (grid, difficulty, limit, offset)
+        return self._connection.execute(query, args).fetchall()
+
+    def count(self, grid=None, difficulty=None):
+        return self._count(self._connection, grid, difficulty)
+
+    @staticmethod
+    def _count(connection, grid=None, difficulty=None):
+        if grid is None:
+            row = connection.execute('SELECT SUM(count) FROM boards').fetchone()
+        else:
+            row = connection.execute(
+                'SELECT count FROM boards WHERE grid = ? AND difficulty = ?',
+                (grid, difficulty)
+            ).fetchone()
+        return row[0] if row and row[0] else 0
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+        self._connection.close()
@@ -1,5 +1,4 @@
 import math
-import random
 import weakref
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -9,7 +8,9 @@ from library.model.control import InputUid
 from library.events import EventId, EventDispatcher
 from library.geometry import Vector2, Direction
 from library.model.field import Block
+from library.model.movement import POSITION_TOLERANCE
 from library.model.state_driver import StateDriver
+from library.rng import RandomSource
 
 
 class Actor(ABC):
@@ -21,10 +22,15 @@ class Actor(ABC):
         self._services = services
         self._event_dispatcher = self._services[EventDispatcher]
         self.name = name
+        self._weak_field = weakref.ref(field)
+        self._movement = field.movement
+        self.units_x = 0
+        self.units_y = 0
+        self.last_units_x = 0
+        self.last_units_y = 0
         self.position = position
         self.direction = direction
         self.max_speed = 0.1  # todo outer, переделать проверки перекрёстков
-        self._weak_field = weakref.ref(field)
         self._event_dispatcher.subscribe(EventId.CROSSWAY, self._on_crossway)
         self.sprite_idx = 0
 
@@ -45,28 +51,57 @@ class Actor(ABC):
     def _field(self):
         return self._weak_field()
 
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        self._movement.place(self)
+
     @property
     def cell(self):
         return Vector2(
-            math.floor(self.position.x),
-            math.floor(self.position.y)
+            math.floor(self.position.x + POSITION_TOLERANCE),
+            math.floor(self.position.y + POSITION_TOLERANCE)
         )
 
     @abstractmethod
     def _on_crossway(self, event_args):
         pass
 
-    def correct_position(self):
-        self.position.x %= self._weak_field().grid.size.x
-        self.position.y %= self._weak_field().grid.size.y
+    @property
+    def cell_key(self):
+        size = self._field.grid.size
+        return (
+            math.floor(self.position.y + POSITION_TOLERANCE) % size.y * size.x
+            + math.floor(self.position.x + POSITION_TOLERANCE) % size.x
+        )
+
+    def center_distance(self):
+        x = self.position.x
+        y = self.position.y
+        center_x = math.floor(x + POSITION_TOLERANCE) + 0.5
+        center_y = math.floor(y + POSITION_TOLERANCE) + 0.5
+        return ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
 
     def update(self):
-        if self.position.distance(self.cell.move(0.5, 0.5)) < 0.06:
-            if not self._field.grid[self.cell].connections[self.direction]:
-                return
-        dx, dy = map(lambda n: self.speed * n, self.direction.to_vector())
-        self.position = self.position.move(dx, dy)
-        self.correct_position()
+        self._movement.update(self)
+
+    def snapshot(self):
+        return (
+            self.position.x, self.position.y, self.direction,
+            self.units_x, self.units_y, self.last_units_x, self.last_units_y
+        )
+
+    def restore(self, snapshot):
+        x, y, self.direction, units_x, units_y, last_units_x, last_units_y = snapshot[:7]
+        self.position = Vector2(x, y)
+        self.units_x = units_x
+        self.units_y = units_y
+        self.last_units_x = last_units_x
+        self.last_units_y = last_units_y
 
 
 class Pacman(Actor):
@@ -122,7 +157,7 @@ class Pacman(Actor):
             self.Mode.WAITING,
             lambda a: (
                 a.actor.name == 'pacman'
-                and not self._field.grid[self.cell].connections[self.direction]
+                and not self._field.grid.is_open(self.cell.x, self.cell.y, self.direction)
             )
         )
         self.state_driver_2.add_transition(
@@ -131,9 +166,9 @@ class Pacman(Actor):
             self.Mode.WALKING,
             lambda a: (
                 a.value in self.controls
-                and self._field.grid[self.cell].connections[
-                    self.controls[a.value]
-                ]
+                and self._field.grid.is_open(
+                    self.cell.x, self.cell.y, self.controls[a.value]
+                )
             )
         )
         self.next_direction = None
@@ -157,6 +192,23 @@ class Pacman(Actor):
     def speed(self):
         return self.max_speed * self.speeds[self.mode]  # todo max_speed
 
+    def snapshot(self):
+        return super().snapshot() + (
+            self.state_driver_1.current_state,
+            self.state_driver_2.current_state,
+            self.next_direction,
+            self.last_turn
+        )
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        (
+            self.state_driver_1.current_state,
+            self.state_driver_2.current_state,
+            self.next_direction,
+            self.last_turn
+        ) = snapshot[7:]
+
     def _on_control(self, event_args):
         if event_args.value in self.controls:
             self.next_direction = self.controls[event_args.value]
@@ -173,7 +225,8 @@ class Pacman(Actor):
     def turn(self):
         if not self.next_direction:
             return
-        if self._field.grid[self.cell].connections[self.next_direction]:
+        cell = self.cell
+        if self._field.grid.is_open(cell.x, cell.y, self.next_direction):
             self.direction = self.next_direction
             self.next_direction = None
 
@@ -250,6 +303,7 @@ class Enemy(Actor):
         )
         self.last_turn = None
         self.last_node = None
+        self._random = services[RandomSource]
         self._event_dispatcher.subscribe(EventId.GHOST_BEHIND_DOOR, self._on_ghost_behind_door, -1)
 
     def destroy(self):
@@ -268,7 +322,7 @@ class Enemy(Actor):
 
     @property
     def dead_target(self):
-        return self._field.grid.anchors['enemies'].move(4, -0.5)
+        return self._field.door_position
 
     @property
     def mode(self):
@@ -280,10 +334,30 @@ class Enemy(Actor):
 
     @property
     def speed(self):
-        return self.max_speed * self.speeds[self.mode[0]]
+        return self.max_speed * self.speeds[self.state_driver_1.current_state]
+
+    def snapshot(self):
+        return super().snapshot() + (
+            self.state_driver_1.current_state,
+            self.state_driver_2.current_state,
+            self.state_driver_3.current_state,
+            self.last_turn,
+            self.last_node
+        )
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        (
+            self.state_driver_1.current_state,
+            self.state_driver_2.current_state,
+            self.state_driver_3.current_state,
+            self.last_turn,
+            self.last_node
+        ) = snapshot[7:]
 
     def update(self):
-        if self.mode[2] == self.Mode.HOME:
+        house_mode = self.state_driver_3.current_state
+        if house_mode == self.Mode.HOME:
             current_node = self.current_node
             if current_node in (0, 3, 6) and current_node != self.last_node:
                 self.direction = Direction.SOUTH
@@ -291,7 +365,7 @@ class Enemy(Actor):
             elif current_node in (2, 5, 8) and current_node != self.last_node:
                 self.direction = Direction.NORTH
                 self.last_node = current_node
-        elif self.mode[2] == self.Mode.EXIT:
+        elif house_mode == self.Mode.EXIT:
             current_node = self.current_node
             if current_node is not None and current_node != self.last_node:
                 self.direction = self._field.enemy_graph.exit[current_node]
@@ -302,9 +376,9 @@ class Enemy(Actor):
 
     @property
     def current_node(self):
-        for node in self._field.enemy_graph.nodes.items():
-            if node[1].distance(self.position) < 0.15:
-                return node[0]
+        for node, position in self._field.enemy_graph.nodes.items():
+            if self._movement.reached(self, position, 0.15):
+                return node
 
     def get_target(self):
         if self.mode[0] == self.Mode.NONE:
@@ -314,15 +388,15 @@ class Enemy(Actor):
                 return self.chase_target
             else:
                 return Vector2(
-                    random.randint(0, self._weak_field().grid.size.x),
-                    random.randint(0, self._weak_field().grid.size.y)
+                    self._random.randint(0, self._weak_field().grid.size.x),
+                    self._random.randint(0, self._weak_field().grid.size.y)
                 )
         elif self.mode[0] == self.Mode.DEAD:
             return self.dead_target
         else:
             return Vector2(
-                random.randint(0, self._weak_field().grid.size.x),
-                random.randint(0, self._weak_field().grid.size.y)
+                self._random.randint(0, self._weak_field().grid.size.x),
+                self._random.randint(0, self._weak_field().grid.size.y)
             )
 
     def _on_crossway(self, event_args):
@@ -331,20 +405,34 @@ class Enemy(Actor):
                 return
             if self.last_turn and self.last_turn.distance(self.cell) < 1:
                 return
-            self.last_turn = self.cell
-            current_block = self._field.grid[self.cell]
-            self.direction = sorted(
+            cell = self.cell
+            self.last_turn = cell
+            grid = self._field.grid
+            target = self.get_target()
+            distances = grid.distances
+            if distances is None:
+                def distance_to_target(direction):
+                    neighbor = grid[cell.move(*direction.to_vector())]
+                    return neighbor.cell.distance(target)
+            else:
+                target_idx = distances.target_index(target)
+
+                def distance_to_target(direction):
+                    neighbor = grid[cell.move(*direction.to_vector())]
+                    return distances.distance_by_index(
+                        distances.junctions.index(neighbor.cell.x, neighbor.cell.y),
+                        target_idx
+                    )
+            self.direction = min(
                 filter(
                     lambda d: (
-                        current_block.connections[d]
+                        grid.is_open(cell.x, cell.y, d)
                         and not self.direction.is_oppositely(d)
                     ),
-                    current_block.connections
+                    Direction
                 ),
-                key=lambda d: self._field.grid[
-                    self.cell.move(*d.to_vector())
-                ].cell.distance(self.get_target())
-            )[0]
+                key=distance_to_target
+            )
 
     def _on_ghost_behind_door(self, event_args):
         if self.name == event_args.name and self.mode[2] == self.Mode.EXIT:
@@ -0,0 +1,121 @@
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+from library.geometry import Direction
+from library.model.field import Block
+
+_east = 1 << list(Direction).index(Direction.EAST)
+_west = 1 << list(Direction).index(Direction.WEST)
+
+
+def _connected_wall_tile(mask):
+    conf = {
+        0: 6, 90: 2, 180: 4, 270: 8, 360: 3, 810: 1, 1080: 9, 1260: 7
+    }
+    values = sorted(
+        direction.value
+        for i, direction in enumerate(Direction)
+        if mask & (1 << i)
+    )
+    return conf.get(sum((i * 3 + 1) * value for i, value in enumerate(values)), 5)
+
+
+# tile by connection mask of a wall that has at least one open side
+_connected_wall_tiles = bytes(
+    _connected_wall_tile(mask) for mask in range(1 << len(Direction))
+)
+
+
+def _solid_wall_tile(up, down):
+    if up & _west:
+        return 13
+    if up & _east:
+        return 12
+    if down & _west:
+        return 11
+    if down & _east:
+        return 10
+    return 5
+
+
+def _house_wall_tile(x, y, house):
+    if house is None:
+        return None
+    if house.x < x < house.x + 7:
+        if y == house.y:
+            return 2
+        if y == house.y + 4:
+            return 8
+    if house.y < y < house.y + 4:
+        if x == house.x:
+            return 4
+        if x == house.x + 7:
+            return 6
+    return None
+
+
+def compute_wall_tiles(template):
+    if np is not None:
+        return _compute_wall_tiles_numpy(template)
+    return _compute_wall_tiles_python(template)
+
+
+def _compute_wall_tiles_python(template):
+    width = template.size.x
+    height = template.size.y
+    masks = template.masks
+    house = template.anchors.get('enemies')
+    tiles = bytearray(width * height)
+    for idx, content in enumerate(template.content):
+        if content != Block.Content.WALL.value:
+            continue
+        x = idx % width
+        y = idx // width
+        tile = _house_wall_tile(x, y, house)
+        if tile is None:
+            if masks[idx]:
+                tile = _connected_wall_tiles[masks[idx]]
+            else:
+                tile = _solid_wall_tile(
+                    masks[(y - 1) % height * width + x],
+                    masks[(y + 1) % height * width + x]
+                )
+        tiles[idx] = tile
+    return bytes(tiles)
+
+
+def _compute_wall_tiles_numpy(template):
+    shape = (template.size.y, template.size.x)
+    masks = np.frombuffer(template.masks, dtype=np.uint8).reshape(shape)
+    content = np.frombuffer(template.content, dtype=np.uint8).reshape(shape)
+    up = np.roll(masks, 1, axis=0)
+    down = np.roll(masks, -1, axis=0)
+    solid = np.select(
+        [up & _west != 0, up & _east != 0, down & _west != 0, down & _east != 0],
+        [13, 12, 11, 10],
+        5
+    )
+    tiles = np.where(
+        masks != 0,
+        np.frombuffer(_connected_wall_tiles, dtype=np.uint8)[masks],
+        solid
+    )
+    house = template.anchors.get('enemies')
+    if house is not None:
+        ys, xs = np.indices(shape)
+        inside_x = (house.x < xs) & (xs < house.x + 7)
+        inside_y = (house.y < ys) & (ys < house.y + 4)
+        tiles = np.select(
+            [
+                inside_x & (ys == house.y),
+                inside_x & (ys == house.y + 4),
+                inside_y & (xs == house.x),
+                inside_y & (xs == house.x + 7)
+            ],
+            [2, 8, 4, 6],
+            tiles
+        )
+    tiles = np.where(content == Block.Content.WALL.value, tiles, 0)
+    return tiles.astype(np.uint8).tobytes()
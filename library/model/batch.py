@@ -0,0 +1,405 @@
+import numpy as np
+
+from library.events import EventId
+from library.geometry import Direction
+from library.model.actor import Pacman, Enemy, RedGhost, PinkGhost, BlueGhost, OrangeGhost
+from library.model.field import Block
+from library.model.game_driver import GameDriver
+from library.model.movement import AbstractMovement, POSITION_TOLERANCE
+from library.rng import RandomSource
+
+
+class BatchSimulator:
+
+    actor_names = ('pacman', 'red_ghost', 'pink_ghost', 'blue_ghost', 'orange_ghost')
+    directions = tuple(Direction)
+
+    max_speed = 0.1
+
+    # the batch counts ticks from GAME_START
+    _ghost_out_ticks = (None,) + tuple(
+        GameDriver.ghost_out_delays[event_id] - GameDriver.start_delay
+        for event_id in (EventId.PINK_GHOST_OUT, EventId.BLUE_GHOST_OUT, EventId.ORANGE_GHOST_OUT)
+    )
+    _first_switch_tick = GameDriver.switch_period - GameDriver.start_delay
+    _switch_period = GameDriver.switch_period
+    _frightened_delay = GameDriver.frightened_duration
+    _energizer_delay = GameDriver.energizer_duration
+
+    _node_offsets = (
+        (2, 2), (2, 2.5), (2, 3),
+        (4, 2), (4, 2.5), (4, 3),
+        (6, 2), (6, 2.5), (6, 3),
+        (4, -0.5)
+    )
+    _node_exits = (
+        Direction.SOUTH, Direction.EAST, Direction.NORTH,
+        Direction.NORTH, Direction.NORTH, Direction.NORTH,
+        Direction.SOUTH, Direction.WEST, Direction.NORTH,
+        Direction.WEST
+    )
+
+    def __init__(self, grid, count, difficulty, seeds=None, god_mode=False, random_source=None):
+        if grid.distances is not None:
+            raise ValueError('Batch simulation supports euclidean ghost targeting only')
+        self.count = count
+        self.difficulty = difficulty
+        self.god_mode = god_mode
+        self.size = np.array(tuple(grid.size), dtype=np.float64)
+        self._width = grid.size.x
+        self._height = grid.size.y
+
+        self._vectors = np.array([tuple(d.to_vector()) for d in self.directions], dtype=np.int64)
+        self._opposite = np.array(
+            [self.directions.index(d.get_oppositely()) for d in self.directions],
+            dtype=np.int64
+        )
+        self._connections = np.zeros((self._height, self._width, 4), dtype=bool)
+        self._junctions = np.zeros((self._height, self._width), dtype=bool)
+        initial_content = np.zeros((self._height, self._width), dtype=np.uint8)
+        for block in grid:
+            self._junctions[block.cell.y, block.cell.x] = grid.junctions.is_junction(block.cell)
+            for i, direction in enumerate(self.directions):
+                self._connections[block.cell.y, block.cell.x, i] = block.connections[direction]
+            initial_content[block.cell.y, block.cell.x] = block.content.value
+
+        enemies = grid.anchors['enemies']
+        pacman = grid.anchors['pacman']
+        self._nodes = np.array(
+            [(enemies.x + dx, enemies.y + dy) for dx, dy in self._node_offsets],
+            dtype=np.float64
+        )
+        self._node_exits = np.array(
+            [self.directions.index(d) for d in self._node_exits],
+            dtype=np.int64
+        )
+        self._door = np.array((enemies.x + 4, enemies.y - 0.5), dtype=np.float64)
+        self._scatter_targets = np.array(
+            [
+                tuple(ghost.scatter_target)
+                for ghost in (RedGhost, PinkGhost, BlueGhost, OrangeGhost)
+            ],
+            dtype=np.float64
+        )
+
+        self._pacman_speeds = np.zeros((len(Pacman.Mode), len(Pacman.Mode)), dtype=np.float64)
+        for (mode1, mode2), speed in Pacman.speeds.items():
+            self._pacman_speeds[mode1.value, mode2.value] = self.max_speed * speed
+        self._enemy_speeds = np.zeros(len(Enemy.Mode), dtype=np.float64)
+        for mode, speed in Enemy.speeds.items():
+            self._enemy_speeds[mode.value] = self.max_speed * speed
+
+        if difficulty == GameDriver.Difficulty.EASY:
+            enemy_start_mode = Enemy.Mode.FREE
+        elif difficulty == GameDriver.Difficulty.NORMAL:
+            enemy_start_mode = Enemy.Mode.SCATTER
+        else:
+            enemy_start_mode = Enemy.Mode.CHASE
+
+        if seeds is not None:
+            self.randoms = [RandomSource(seed) for seed in seeds]
+        elif random_source is not None:
+            self.randoms = random_source.spawn(count)
+        else:
+            self.randoms = [RandomSource(seed) for seed in range(count)]
+        if len(self.randoms) != count:
+            raise ValueError('Seed count does not match game count')
+
+        self.tick = 0
+        self.time = np.zeros(count, dtype=np.int64)
+        self.done = np.zeros(count, dtype=bool)
+        self.scores = np.zeros(count, dtype=np.int64)
+        self.content = np.repeat(initial_content[None], count, axis=0)
+        self.dots = np.full(count, np.count_nonzero(initial_content == Block.Content.DOT.value), dtype=np.int64)
+
+        self.positions = np.empty((count, 5, 2), dtype=np.float64)
+        self.positions[:, 0] = (pacman.x + 1, pacman.y + 0.5)
+        self.positions[:, 1] = (enemies.x + 4, enemies.y - 0.5)
+        self.positions[:, 2] = (enemies.x + 4, enemies.y + 2.5)
+        self.positions[:, 3] = (enemies.x + 2, enemies.y + 2.5)
+        self.positions[:, 4] = (enemies.x + 6, enemies.y + 2.5)
+        self.direction = np.empty((count, 5), dtype=np.int64)
+        self.direction[:] = [
+            self.directions.index(d)
+            for d in (Direction.WEST, Direction.WEST, Direction.NORTH, Direction.SOUTH, Direction.SOUTH)
+        ]
+        self.next_direction = np.full(count, -1, dtype=np.int64)
+        self.last_turn = np.full((count, 5, 2), -1, dtype=np.int64)
+        self.last_node = np.full((count, 4), -1, dtype=np.int64)
+
+        self.pacman_mode = np.empty((count, 2), dtype=np.int8)
+        self.pacman_mode[:] = (Pacman.Mode.NONE.value, Pacman.Mode.WALKING.value)
+        self.enemy_mode = np.empty((count, 4, 3), dtype=np.int8)
+        self.enemy_mode[:, :, 0] = Enemy.Mode.NONE.value
+        self.enemy_mode[:, :, 1] = enemy_start_mode.value
+        self.enemy_mode[:, 0, 2] = Enemy.Mode.NONE.value
+        self.enemy_mode[:, 1:, 2] = Enemy.Mode.HOME.value
+
+        timer_slots = max(1, np.count_nonzero(initial_content == Block.Content.ENERGIZER.value))
+        self._frightened_due = np.full((count, timer_slots), -1, dtype=np.int64)
+        self._energizer_due = np.full((count, timer_slots), -1, dtype=np.int64)
+
+    @property
+    def dot_map(self):
+        return self.content == Block.Content.DOT.value
+
+    def control_code(self, direction):
+        return self.directions.index(direction)
+
+    def run(self, ticks, policy=None):
+        for _ in range(ticks):
+            if self.done.all():
+                break
+            self.step(policy(self) if policy else None)
+
+    def step(self, controls=None):
+        alive = ~self.done
+        if controls is not None:
+            self._apply_controls(np.asarray(controls, dtype=np.int64), alive)
+        self._fire_scheduled(alive)
+        self._update_actors(alive)
+        self._notify_crossways(alive)
+        self._notify_pickups(alive)
+        self._notify_intersections(alive)
+        self._notify_ghost_events(alive)
+        self.done |= alive & (
+            (self.pacman_mode[:, 0] == Pacman.Mode.DEAD.value) | (self.dots == 0)
+        )
+        self.time += alive
+        self.tick += 1
+
+    def _wrap(self, cells):
+        return cells[..., 0] % self._width, cells[..., 1] % self._height
+
+    def _center_distance(self, positions):
+        cells = np.floor(positions + POSITION_TOLERANCE)
+        delta = positions - (cells + 0.5)
+        return cells.astype(np.int64), np.sqrt(delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1])
+
+    @staticmethod
+    def _distance(a, b):
+        delta = a - b
+        return np.sqrt(delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1])
+
+    def _apply_controls(self, controls, alive):
+        games = np.nonzero(alive & (controls >= 0))[0]
+        if not games.size:
+            return
+        control = controls[games]
+        cells = np.floor(self.positions[games, 0] + POSITION_TOLERANCE).astype(np.int64)
+        x, y = self._wrap(cells)
+        is_open = self._connections[y, x, control]
+        waiting = self.pacman_mode[games, 1] == Pacman.Mode.WAITING.value
+        self.pacman_mode[games[waiting & is_open], 1] = Pacman.Mode.WALKING.value
+        self.next_direction[games] = control
+        turn = is_open & (self._opposite[self.direction[games, 0]] == control)
+        self.direction[games[turn], 0] = control[turn]
+        self.next_direction[games[turn]] = -1
+
+    def _fire_scheduled(self, alive):
+        enemy_mode = self.enemy_mode
+        for ghost, out_tick in enumerate(self._ghost_out_ticks):
+            if out_tick == self.tick:
+                home = alive & (enemy_mode[:, ghost, 2] == Enemy.Mode.HOME.value)
+                enemy_mode[home, ghost, 2] = Enemy.Mode.EXIT.value
+        if (
+                self.difficulty == GameDriver.Difficulty.NORMAL
+                and self.tick >= self._first_switch_tick
+                and (self.tick - self._first_switch_tick) % self._switch_period == 0
+        ):
+            switch = alive[:, None] & np.isin(
+                enemy_mode[:, :, 1], (Enemy.Mode.SCATTER.value, Enemy.Mode.CHASE.value)
+            )
+            enemy_mode[:, :, 1][switch] = Enemy.Mode.CHASE.value
+
+        # an energizer timeout due on the same tick as a frightened timeout
+        # was always scheduled earlier, so it fires first
+        due = self._energizer_due == self.tick
+        fired = alive & due.any(axis=1)
+        if fired.any():
+            self._energizer_due[due] = -1
+            energized = fired & (self.pacman_mode[:, 0] == Pacman.Mode.ENERGIZER.value)
+            self.pacman_mode[energized, 0] = Pacman.Mode.NONE.value
+            ending = fired[:, None] & (enemy_mode[:, :, 0] == Enemy.Mode.FRIGHTENED_END.value)
+            enemy_mode[:, :, 0][ending] = Enemy.Mode.NONE.value
+        due = self._frightened_due == self.tick
+        fired = alive & due.any(axis=1)
+        if fired.any():
+            self._frightened_due[due] = -1
+            frightened = fired[:, None] & (enemy_mode[:, :, 0] == Enemy.Mode.FRIGHTENED.value)
+            enemy_mode[:, :, 0][frightened] = Enemy.Mode.FRIGHTENED_END.value
+
+    def _update_ghost_house(self, alive):
+        mode = self.enemy_mode[:, :, 2]
+        games, ghosts = np.nonzero(
+            alive[:, None] & np.isin(mode, (Enemy.Mode.HOME.value, Enemy.Mode.EXIT.value))
+        )
+        if not games.size:
+            return
+        actors = ghosts + 1
+        distance = self._distance(self._nodes[None], self.positions[games, actors][:, None])
+        near = distance < 0.15 - POSITION_TOLERANCE
+        node = np.where(near.any(axis=1), near.argmax(axis=1), -1)
+        changed = (node >= 0) & (node != self.last_node[games, ghosts])
+        mode = mode[games, ghosts]
+
+        home = changed & (mode == Enemy.Mode.HOME.value)
+        top = home & np.isin(node, (0, 3, 6))
+        bottom = home & np.isin(node, (2, 5, 8))
+        self.direction[games[top], actors[top]] = self.directions.index(Direction.SOUTH)
+        self.direction[games[bottom], actors[bottom]] = self.directions.index(Direction.NORTH)
+
+        leaving = changed & (mode == Enemy.Mode.EXIT.value)
+        self.direction[games[leaving], actors[leaving]] = self._node_exits[node[leaving]]
+        self.positions[games[leaving], actors[leaving]] = self._nodes[node[leaving]]
+
+        turned = top | bottom | leaving
+        self.last_node[games[turned], ghosts[turned]] = node[turned]
+
+    def _update_actors(self, alive):
+        self._update_ghost_house(alive)
+        speeds = np.empty((self.count, 5), dtype=np.float64)
+        speeds[:, 0] = self._pacman_speeds[self.pacman_mode[:, 0], self.pacman_mode[:, 1]]
+        speeds[:, 1:] = self._enemy_speeds[self.enemy_mode[:, :, 0]]
+        cells, distance = self._center_distance(self.positions)
+        x, y = self._wrap(cells)
+        stopping = distance < AbstractMovement.stop_distance - POSITION_TOLERANCE
+        blocked = stopping & ~self._connections[y, x, self.direction]
+        moving = alive[:, None] & ~blocked
+        positions = self.positions[moving]
+        vectors = self._vectors[self.direction[moving]]
+        self.positions[moving] = (positions + speeds[moving][:, None] * vectors) % self.size
+
+    def _notify_crossways(self, alive):
+        self._notify_pacman_crossway(alive)
+        self._notify_enemy_crossways(alive)
+
+    def _notify_pacman_crossway(self, alive):
+        cells, distance = self._center_distance(self.positions[:, 0])
+        x, y = self._wrap(cells)
+        crossway = alive & (distance < 0.15 - POSITION_TOLERANCE) & self._junctions[y, x]
+        next_direction = self.next_direction
+        turn = crossway & (next_direction >= 0) & self._connections[y, x, np.maximum(next_direction, 0)]
+        self.direction[turn, 0] = next_direction[turn]
+        next_direction[turn] = -1
+        snap = crossway & (self.last_turn[:, 0] != cells).any(axis=1)
+        self.positions[snap, 0] = cells[snap] + 0.5
+        self.last_turn[snap, 0] = cells[snap]
+        stop = (
+            crossway
+            & (self.pacman_mode[:, 1] == Pacman.Mode.WALKING.value)
+            & ~self._connections[y, x, self.direction[:, 0]]
+        )
+        self.pacman_mode[stop, 1] = Pacman.Mode.WAITING.value
+
+    def _chase_targets(self):
+        pacman = self.positions[:, 0]
+        pacman_vector = self._vectors[self.direction[:, 0]]
+        targets = np.empty((self.count, 4, 2), dtype=np.float64)
+        targets[:, 0] = pacman
+        targets[:, 1] = pacman + 4 * pacman_vector
+        targets[:, 2] = -self.positions[:, 1] + (pacman + 2 * pacman_vector) * 2
+        far = self._distance(pacman, self.positions[:, 4]) > 8
+        targets[:, 3] = np.where(far[:, None], pacman, self._scatter_targets[3])
+        return targets
+
+    def _notify_enemy_crossways(self, alive):
+        positions = self.positions[:, 1:]
+        cells, distance = self._center_distance(positions)
+        x, y = self._wrap(cells)
+        turning = (
+            alive[:, None]
+            & (distance < 0.15 - POSITION_TOLERANCE)
+            & self._junctions[y, x]
+            & (self.enemy_mode[:, :, 2] == Enemy.Mode.NONE.value)
+            & (self.last_turn[:, 1:] != cells).any(axis=2)
+        )
+        if not turning.any():
+            return
+        self.last_turn[:, 1:][turning] = cells[turning]
+
+        mode1 = self.enemy_mode[:, :, 0]
+        mode2 = self.enemy_mode[:, :, 1]
+        targets = np.where(
+            (mode2 == Enemy.Mode.SCATTER.value)[:, :, None],
+            self._scatter_targets[None],
+            self._chase_targets()
+        )
+        targets[mode1 == Enemy.Mode.DEAD.value] = self._door
+        randomized = turning & (
+            np.isin(mode1, (Enemy.Mode.FRIGHTENED.value, Enemy.Mode.FRIGHTENED_END.value))
+            | ((mode1 == Enemy.Mode.NONE.value) & (mode2 == Enemy.Mode.FREE.value))
+        )
+
+        for game, ghost in zip(*np.nonzero(randomized)):
+            rng = self.randoms[game]
+            targets[game, ghost] = (rng.randint(0, self._width), rng.randint(0, self._height))
+
+        direction = self.direction[:, 1:]
+        candidates = self._connections[y, x] & (
+            np.arange(4)[None, None] != self._opposite[direction][:, :, None]
+        )
+        neighbors = cells[:, :, None] + self._vectors[None, None]
+        neighbors = np.stack(self._wrap(neighbors), axis=-1).astype(np.float64)
+        keys = self._distance(neighbors, targets[:, :, None])
+        keys[~candidates] = np.inf
+
+        choice = keys.argmin(axis=2)
+        turning &= candidates.any(axis=2)
+        direction[turning] = choice[turning]
+
+    def _notify_pickups(self, alive):
+        games = np.nonzero(alive)[0]
+        cells = np.floor(self.positions[games, 0] + POSITION_TOLERANCE).astype(np.int64)
+        x, y = self._wrap(cells)
+        pickup = self.content[games, y, x]
+        picked = pickup != Block.Content.EMPTY.value
+        if not picked.any():
+            return
+        dot = pickup == Block.Content.DOT.value
+        energizer = pickup == Block.Content.ENERGIZER.value
+        fruit = pickup == Block.Content.FRUIT.value
+        self.scores[games] += 10 * dot + 100 * energizer + 500 * fruit
+        self.dots[games] -= dot
+        self.content[games[picked], y[picked], x[picked]] = Block.Content.EMPTY.value
+
+        energized = games[energizer]
+        if not energized.size:
+            return
+        for due, delay in (
+                (self._frightened_due, self._frightened_delay),
+                (self._energizer_due, self._energizer_delay)
+        ):
+            slot = (due[energized] < 0).argmax(axis=1)
+            due[energized, slot] = self.tick + delay
+        pacman = energized[self.pacman_mode[energized, 0] == Pacman.Mode.NONE.value]
+        self.pacman_mode[pacman, 0] = Pacman.Mode.ENERGIZER.value
+        mode1 = self.enemy_mode[energized, :, 0]
+        mode1[np.isin(mode1, (Enemy.Mode.NONE.value, Enemy.Mode.FRIGHTENED_END.value))] = (
+            Enemy.Mode.FRIGHTENED.value
+        )
+        self.enemy_mode[energized, :, 0] = mode1
+
+    def _notify_intersections(self, alive):
+        cells = np.floor(self.positions + POSITION_TOLERANCE).astype(np.int64)
+        intersection = alive[:, None] & (cells[:, 1:] == cells[:, :1]).all(axis=2)
+        if not self.god_mode:
+            dead = intersection.any(axis=1) & (self.pacman_mode[:, 0] == Pacman.Mode.NONE.value)
+            self.pacman_mode[dead, 0] = Pacman.Mode.DEAD.value
+        eaten = intersection & np.isin(
+            self.enemy_mode[:, :, 0],
+            (Enemy.Mode.FRIGHTENED.value, Enemy.Mode.FRIGHTENED_END.value)
+        )
+        self.enemy_mode[:, :, 0][eaten] = Enemy.Mode.DEAD.value
+
+    def _notify_ghost_events(self, alive):
+        door_distance = self._distance(self.positions[:, 1:], self._door)
+        behind_door = alive[:, None] & (door_distance < 0.15 - POSITION_TOLERANCE)
+        if not behind_door.any():
+            return
+        mode = self.enemy_mode
+        leaving = behind_door & (mode[:, :, 2] == Enemy.Mode.EXIT.value)
+        self.direction[:, 1:][leaving] = self.directions.index(Direction.WEST)
+        revived = behind_door & (mode[:, :, 0] == Enemy.Mode.DEAD.value)
+        mode[:, :, 0][revived] = Enemy.Mode.NONE.value
+        mode[:, :, 2][leaving] = Enemy.Mode.NONE.value
@@ -11,3 +11,5 @@ class InputUid(Enum):
     SAVE = 6
     LOAD = 7
     STEP = 8
+    REWIND = 9
+    FORWARD = 10
@@ -0,0 +1,164 @@
+import heapq
+import math
+from array import array
+from collections import deque
+
+
+UNREACHABLE = 0xFFFF
+
+
+class AbstractDistanceTable:
+
+    def __init__(self, junctions):
+        self.junctions = junctions
+        self.size = junctions.size
+        self._nearest = self._build_nearest()
+
+    def _neighbors(self, idx):
+        width = self.size.x
+        height = self.size.y
+        x = idx % width
+        y = idx // width
+        return (
+            y * width + (x + 1) % width,
+            ((y - 1) % height) * width + x,
+            y * width + (x - 1) % width,
+            ((y + 1) % height) * width + x
+        )
+
+    def _build_nearest(self):
+        walkable = self.junctions.walkable
+        nearest = array('l', [-1]) * len(walkable)
+        queue = deque()
+        for idx, is_walkable in enumerate(walkable):
+            if is_walkable:
+                nearest[idx] = idx
+                queue.append(idx)
+        while queue:
+            idx = queue.popleft()
+            for neighbor in self._neighbors(idx):
+                if nearest[neighbor] < 0:
+                    nearest[neighbor] = nearest[idx]
+                    queue.append(neighbor)
+        return nearest
+
+    def target_index(self, target):
+        x = min(max(math.floor(target.x), 0), self.size.x - 1)
+        y = min(max(math.floor(target.y), 0), self.size.y - 1)
+        return self._nearest[self.junctions.index(x, y)]
+
+    def distance(self, from_cell, to_cell):
+        return self.distance_by_index(
+            self.junctions.index(from_cell.x, from_cell.y),
+            self.junctions.index(to_cell.x, to_cell.y)
+        )
+
+    def distance_by_index(self, from_idx, to_idx):
+        pass
+
+
+class DistanceTable(AbstractDistanceTable):
+
+    def __init__(self, junctions):
+        super().__init__(junctions)
+        walkable = junctions.walkable
+        self._ordinals = array('l', [-1]) * len(walkable)
+        cells = [idx for idx, is_walkable in enumerate(walkable) if is_walkable]
+        for ordinal, idx in enumerate(cells):
+            self._ordinals[idx] = ordinal
+        self._count = len(cells)
+        self._table = array('H', [UNREACHABLE]) * (self._count * self._count)
+        adjacency = [
+            tuple(self._ordinals[n] for n in self._neighbors(idx) if walkable[n])
+            for idx in cells
+        ]
+        for source in range(self._count):
+            self._bfs(source, adjacency)
+
+    def _bfs(self, source, adjacency):
+        table = self._table
+        row = source * self._count
+        table[row + source] = 0
+        frontier = [source]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for ordinal in frontier:
+                for neighbor in adjacency[ordinal]:
+                    if table[row + neighbor] == UNREACHABLE:
+                        table[row + neighbor] = min(distance, UNREACHABLE - 1)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+    def distance_by_index(self, from_idx, to_idx):
+        from_ordinal = self._ordinals[from_idx]
+        to_ordinal = self._ordinals[to_idx]
+        if from_ordinal < 0 or to_ordinal < 0:
+            return UNREACHABLE
+        return self._table[from_ordinal * self._count + to_ordinal]
+
+
+class JunctionDistanceTable(AbstractDistanceTable):
+
+    def __init__(self, junctions):
+        super().__init__(junctions)
+        self._ordinals = {cell: i for i, cell in enumerate(junctions.junctions)}
+        self._count = len(junctions.junctions)
+        self._table = array('H', [UNREACHABLE]) * (self._count * self._count)
+        for start, ordinal in self._ordinals.items():
+            row = ordinal * self._count
+            for other, distance in self._dijkstra(start).items():
+                self._table[row + self._ordinals[other]] = min(distance, UNREACHABLE)
+
+    def _dijkstra(self, start):
+        distances = {start: 0}
+        queue = [(0, start)]
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            if distance > distances[cell]:
+                continue
+            for _, segment in self.junctions.exits[cell]:
+                other = segment.end if segment.start == cell else segment.start
+                candidate = distance + segment.length
+                if candidate < distances.get(other, UNREACHABLE):
+                    distances[other] = candidate
+                    heapq.heappush(queue, (candidate, other))
+        return distances
+
+    def _endpoints(self, idx):
+        width = self.size.x
+        cell = (idx % width, idx // width)
+        if cell in self._ordinals:
+            return ((self._ordinals[cell], 0),), None, 0
+        located = self.junctions.segment_at_index(idx)
+        if located is None:
+            return (), None, 0
+        segment, offset = located
+        return (
+            (self._ordinals[segment.start], offset),
+            (self._ordinals[segment.end], segment.length - offset)
+        ), segment, offset
+
+    def distance_by_index(self, from_idx, to_idx):
+        if from_idx == to_idx:
+            return 0 if self.junctions.walkable[from_idx] else UNREACHABLE
+        from_endpoints, from_segment, from_offset = self._endpoints(from_idx)
+        to_endpoints, to_segment, to_offset = self._endpoints(to_idx)
+        result = UNREACHABLE
+        if from_segment is not None and from_segment is to_segment:
+            result = abs(from_offset - to_offset)
+        for from_ordinal, from_distance in from_endpoints:
+            row = from_ordinal * self._count
+            for to_ordinal, to_distance in to_endpoints:
+                between = self._table[row + to_ordinal]
+                if between != UNREACHABLE:
+                    result = min(result, from_distance + between + to_distance)
+        return result
+
+
+def create_distance_table(junctions, max_bytes):
+    walkable_count = sum(junctions.walkable)
+    if walkable_count * walkable_count * array('H').itemsize <= max_bytes:
+        return DistanceTable(junctions)
+    return JunctionDistanceTable(junctions)
@@ -1,8 +1,11 @@
 import itertools
+from array import array
 from enum import Enum
 
+from library.config import AbstractConfig
 from library.events import EventId, EventDispatcher
 from library.geometry import Direction, Vector2
+from library.model.movement import create_movement
 
 
 class Block:
@@ -29,6 +32,12 @@ class Grid:
         self.size = size
         self.dimensions = [[None for c in range(self.size.x)] for r in range(self.size.y)]
         self.anchors = anchors
+        self.junctions = None
+        self.distances = None
+        self.wall_tiles = None
+        self.revision = 0
+        self._stored_revision = None
+        self._stored_content = None
 
     def __getitem__(self, cell):
         x = cell.x % self.size.x
@@ -37,10 +46,307 @@ class Grid:
 
     def __setitem__(self, cell, value):
         self.dimensions[cell.y][cell.x] = value
+        self.revision += 1
 
     def __iter__(self):
         return itertools.chain(*self.dimensions)
 
+    @classmethod
+    def from_template(cls, template):
+        grid = cls(dict(template.anchors), template.size)
+        width = template.size.x
+        grid.dimensions = [
+            [
+                Block(
+                    template.cells[idx],
+                    _contents[template.content[idx]],
+                    template.connections[idx]
+                )
+                for idx in range(y * width, (y + 1) * width)
+            ]
+            for y in range(template.size.y)
+        ]
+        grid.junctions = template.junctions
+        grid.wall_tiles = template.wall_tiles
+        return grid
+
+    def get_content_at_index(self, idx):
+        return self.dimensions[idx // self.size.x][idx % self.size.x].content
+
+    def set_content_at_index(self, idx, content):
+        self.dimensions[idx // self.size.x][idx % self.size.x].content = content
+        self.revision += 1
+
+    def is_open(self, x, y, direction):
+        return self.dimensions[y % self.size.y][x % self.size.x].connections[direction]
+
+    def store_content(self):
+        if self._stored_revision != self.revision:
+            self._stored_content = bytes(block.content.value for block in self)
+            self._stored_revision = self.revision
+        return self._stored_content
+
+    def restore_content(self, data):
+        for block, value in zip(self, data):
+            block.content = _contents[value]
+        self.revision += 1
+        self._stored_content = data
+        self._stored_revision = self.revision
+
+
+_contents = tuple(Block.Content)
+_connection_bits = {direction: 1 << i for i, direction in enumerate(Direction)}
+
+
+def _padded_indices(size):
+    # a one-cell border around the grid maps back onto the opposite edge
+    return array('l', (
+        (y % size.y) * size.x + x % size.x
+        for y in range(-1, size.y + 1)
+        for x in range(-1, size.x + 1)
+    ))
+
+
+class GridTemplate:
+
+    def __init__(self, size, content, masks, anchors):
+        self.size = size
+        self.content = bytes(content)
+        self.masks = bytes(masks)
+        self.anchors = anchors
+        self.junctions = None
+        self.wall_tiles = None
+        self.padded = _padded_indices(size)
+        # only the blocks backend needs per-cell objects, built on first use
+        self._cells = None
+        self._connections = None
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            self._cells = tuple(
+                Vector2(idx % self.size.x, idx // self.size.x)
+                for idx in range(self.size.x * self.size.y)
+            )
+        return self._cells
+
+    @property
+    def connections(self):
+        if self._connections is None:
+            # blocks with the same mask share one read-only connections dict
+            shared_connections = {
+                mask: {direction: bool(mask & bit) for direction, bit in _connection_bits.items()}
+                for mask in set(self.masks)
+            }
+            self._connections = tuple(shared_connections[mask] for mask in self.masks)
+        return self._connections
+
+    @classmethod
+    def build(cls, size, contents, can_enter, anchors):
+        offsets = [
+            (direction.to_vector(), bit) for direction, bit in _connection_bits.items()
+        ]
+        masks = bytearray(size.x * size.y)
+        for idx in range(size.x * size.y):
+            x = idx % size.x
+            y = idx // size.x
+            mask = 0
+            for offset, bit in offsets:
+                if can_enter[(y + offset.y) % size.y * size.x + (x + offset.x) % size.x]:
+                    mask |= bit
+            masks[idx] = mask
+        return cls(size, bytes(content.value for content in contents), masks, anchors)
+
+
+class CompactBlock:
+
+    __slots__ = ('_grid', '_idx', 'cell')
+
+    def __init__(self, grid, idx, cell):
+        self._grid = grid
+        self._idx = idx
+        self.cell = cell
+
+    @property
+    def content(self):
+        return _contents[self._grid.content[self._idx]]
+
+    @content.setter
+    def content(self, value):
+        self._grid.content[self._idx] = value.value
+        self._grid.revision += 1
+
+    @property
+    def connections(self):
+        mask = self._grid.masks[self._idx]
+        return {
+            direction: bool(mask & bit)
+            for direction, bit in _connection_bits.items()
+        }
+
+
+class CompactGrid:
+
+    def __init__(self, anchors, size, masks=None, padded=None):
+        self.size = size
+        self.anchors = anchors
+        self.junctions = None
+        self.distances = None
+        self.wall_tiles = None
+        self.content = bytearray(size.x * size.y)
+        # masks may be shared with a template and are copied on first write
+        self.masks = masks if masks is not None else bytearray(size.x * size.y)
+        self.revision = 0
+        self._stored_revision = None
+        self._stored_content = None
+        self._width = size.x
+        self._height = size.y
+        self._stride = size.x + 2
+        self._padded = padded if padded is not None else _padded_indices(size)
+
+    @classmethod
+    def from_template(cls, template):
+        grid = cls(dict(template.anchors), template.size, template.masks, template.padded)
+        grid.content[:] = template.content
+        grid.junctions = template.junctions
+        grid.wall_tiles = template.wall_tiles
+        return grid
+
+    def index(self, x, y):
+        if -1 <= x <= self._width and -1 <= y <= self._height:
+            return self._padded[(y + 1) * self._stride + x + 1]
+        return (y % self._height) * self._width + x % self._width
+
+    def __getitem__(self, cell):
+        idx = self.index(cell.x, cell.y)
+        return CompactBlock(self, idx, Vector2(idx % self._width, idx // self._width))
+
+    def __setitem__(self, cell, value):
+        idx = self.index(cell.x, cell.y)
+        self.content[idx] = value.content.value
+        if not isinstance(self.masks, bytearray):
+            self.masks = bytearray(self.masks)
+        mask = 0
+        for direction, connected in value.connections.items():
+            if connected:
+                mask |= _connection_bits[direction]
+        self.masks[idx] = mask
+        self.revision += 1
+
+    def __iter__(self):
+        for idx in range(self._width * self._height):
+            yield CompactBlock(self, idx, Vector2(idx % self._width, idx // self._width))
+
+    def get_content_at_index(self, idx):
+        return _contents[self.content[idx]]
+
+    def set_content_at_index(self, idx, content):
+        self.content[idx] = content.value
+        self.revision += 1
+
+    def is_open(self, x, y, direction):
+        return self.masks[self.index(x, y)] & _connection_bits[direction] != 0
+
+    def store_content(self):
+        if self._stored_revision != self.revision:
+            self._stored_content = bytes(self.content)
+            self._stored_revision = self.revision
+        return self._stored_content
+
+    def restore_content(self, data):
+        self.content[:] = data
+        self.revision += 1
+        self._stored_content = data
+        self._stored_revision = self.revision
+
+
+class Segment:
+
+    def __init__(self, start, direction, end, length, cells):
+        self.start = start
+        self.direction = direction
+        self.end = end
+        self.length = length
+        self.cells = cells
+
+
+class JunctionGraph:
+
+    _straight = (
+        {Direction.NORTH, Direction.SOUTH},
+        {Direction.EAST, Direction.WEST}
+    )
+
+    def __init__(self, grid):
+        self.size = grid.size
+        self.junctions = []
+        self.segments = []
+        self.exits = {}
+        self.walkable = bytearray(self.size.x * self.size.y)
+        self._junction_flags = bytearray(self.size.x * self.size.y)
+        self._segment_cells = {}
+        self._build(grid)
+
+    def index(self, x, y):
+        return (y % self.size.y) * self.size.x + x % self.size.x
+
+    def _build(self, grid):
+        for block in grid:
+            if block.content in (Block.Content.WALL, Block.Content.DOOR):
+                continue
+            idx = self.index(block.cell.x, block.cell.y)
+            self.walkable[idx] = 1
+            directions = {d for d, connected in block.connections.items() if connected}
+            if directions not in self._straight:
+                self._junction_flags[idx] = 1
+                self.junctions.append((block.cell.x, block.cell.y))
+                self.exits[block.cell.x, block.cell.y] = []
+        visited = set()
+        for start in self.junctions:
+            for direction in grid[Vector2(*start)].connections:
+                if not grid[Vector2(*start)].connections[direction] or (start, direction) in visited:
+                    continue
+                segment = self._trace(start, direction)
+                if segment is None:
+                    continue
+                visited.add((start, direction))
+                visited.add((segment.end, direction.get_oppositely()))
+                self.exits[start].append((direction, segment))
+                self.exits[segment.end].append((direction.get_oppositely(), segment))
+                for offset, cell in enumerate(segment.cells, 1):
+                    self._segment_cells[self.index(*cell)] = (segment, offset)
+                self.segments.append(segment)
+
+    def _trace(self, start, direction):
+        dx, dy = direction.to_vector()
+        x, y = start
+        cells = []
+        for length in range(1, self.size.x * self.size.y + 1):
+            x = (x + dx) % self.size.x
+            y = (y + dy) % self.size.y
+            idx = self.index(x, y)
+            if not self.walkable[idx]:
+                return None
+            if self._junction_flags[idx]:
+                return Segment(start, direction, (x, y), length, cells)
+            cells.append((x, y))
+        return None
+
+    def is_walkable(self, cell):
+        return self.walkable[self.index(cell.x, cell.y)] == 1
+
+    def is_junction(self, cell):
+        return self._junction_flags[self.index(cell.x, cell.y)] == 1
+
+    def is_junction_at_index(self, idx):
+        return self._junction_flags[idx] == 1
+
+    def segment_at(self, cell):
+        return self.segment_at_index(self.index(cell.x, cell.y))
+
+    def segment_at_index(self, idx):
+        return self._segment_cells.get(idx)
+
 
 class Graph:
 
@@ -60,6 +366,10 @@ class Field:
         self.grid = grid
         self.enemy_graph = Graph()
         self._build_graph()
+        self.door_position = self.grid.anchors['enemies'].move(4, -0.5)
+        self.movement = create_movement(
+            services[AbstractConfig]['gameplay']['movement_model'], grid
+        )
 
     def _build_graph(self):
         self.enemy_graph.add_node(self.grid.anchors['enemies'].move(2, 2))
@@ -101,33 +411,36 @@ class Field:
         for enemy in self.actors.values():
             if enemy == pacman:
                 continue
-            if pacman.cell == enemy.cell:
+            if pacman.cell_key == enemy.cell_key:
                 self._services[EventDispatcher].fire(EventId.INTERSECTION, self, enemy=enemy)
 
     def _notify_crossways(self):
+        junctions = self.grid.junctions
         for actor in self.actors.values():
-            neighbors = set(self.grid[actor.cell].connections.values())
-            if neighbors not in (
-                    {Direction.NORTH, Direction.SOUTH},
-                    {Direction.EAST, Direction.WEST}
-            ):
-                # todo повысить погрешность и выравнивать положение
-                if actor.position.distance(actor.cell.move(0.5, 0.5)) < 0.15:
-                    self._services[EventDispatcher].fire(EventId.CROSSWAY, self, actor=actor)
+            if not junctions.is_junction_at_index(actor.cell_key):
+                continue
+            # todo повысить погрешность и выравнивать положение
+            if self.movement.at_center(actor, 0.15):
+                direction = actor.direction
+                self._services[EventDispatcher].fire(EventId.CROSSWAY, self, actor=actor)
+                if actor.direction != direction:
+                    self.movement.align(actor)
 
     def _notify_pickups(self):
-        pacman = self.actors['pacman']
-        if self.grid[pacman.cell].content != Block.Content.EMPTY:
-            self._services[EventDispatcher].fire(EventId.PICKUP, self, pickup=self.grid[pacman.cell].content)
-            self.grid[pacman.cell].content = Block.Content.EMPTY
+        idx = self.actors['pacman'].cell_key
+        content = self.grid.get_content_at_index(idx)
+        if content != Block.Content.EMPTY:
+            self._services[EventDispatcher].fire(EventId.PICKUP, self, pickup=content)
+            self.grid.set_content_at_index(idx, Block.Content.EMPTY)
 
     def _notify_ghost_events(self):
         for actor in self.actors.values():
             if actor.name == 'pacman':
                 continue
-            if actor.position.distance(actor.dead_target) < 0.15:
+            if self.movement.reached(actor, actor.dead_target, 0.15):
                 self._services[EventDispatcher].fire(EventId.GHOST_ON_DEAD_TARGET, self, name=actor.name)
-            if actor.position.distance(
-                    self.grid.anchors['enemies'].move(4, -0.5)
-            ) < 0.15:
+            if self.movement.reached(actor, self.door_position, 0.15):
+                direction = actor.direction
                 self._services[EventDispatcher].fire(EventId.GHOST_BEHIND_DOOR, self, name=actor.name)
+                if actor.direction != direction:
+                    self.movement.align_to(actor, self.door_position)
@@ -12,7 +12,10 @@ from library.model.field import Field, Block
 from library.geometry import Direction, Vector2
 from library.model.menu import Menu, PageItem, RatingsItem, RecordItem, SaveItem, \
     LoadItem
+from library.model.rewind import GameSnapshot, RewindBuffer
 from library.resource_manager import ResourceManager
+from library.rng import RandomSource
+from library.save import SaveGame
 from library.time import Scheduler
 
 
@@ -26,17 +29,30 @@ class GameDriver:
         WAIT = 4
         FREE = 5
         PAUSE = 6
+        REWIND = 7
 
     class Difficulty(Enum):
         EASY = 0
         NORMAL = 1
         HARD = 2
 
+    # scheduler delays in ticks, BatchSimulator follows the same timeline
+    start_delay = 250
+    ghost_out_delays = {
+        EventId.PINK_GHOST_OUT: 300,
+        EventId.BLUE_GHOST_OUT: 400,
+        EventId.ORANGE_GHOST_OUT: 500
+    }
+    switch_period = 1000
+    frightened_duration = 600
+    energizer_duration = 800
+
     def __init__(self, services):
         self._services = services
         self._event_dispatcher = self._services[EventDispatcher]
         self._resources = self._services[ResourceManager]
         self._config = self._services[AbstractConfig]
+        self._random = self._services[RandomSource]
         self.menu = None
         self._init_menu()
         self._scheduler = Scheduler(self._event_dispatcher)
@@ -47,8 +63,13 @@ class GameDriver:
         self.level = None
         self.scores = None
         self.lives = None
+        self.seed = None
         self.field = None
         self._dots = None
+        self.storage_enabled = True
+        self._rewind = None
+        if self._config['debug']['is_debug']:
+            self._rewind = RewindBuffer(self._config['debug']['rewind_ticks'])
         self._event_dispatcher.subscribe(EventId.TICK, self._on_tick, 2)
         self._event_dispatcher.subscribe(EventId.PICKUP, self._on_pickup)
         self._event_dispatcher.subscribe(EventId.CONTROL, self._on_control)
@@ -57,6 +78,7 @@ class GameDriver:
         self._event_dispatcher.subscribe(EventId.GAME_END, self._on_game_end)
         self._event_dispatcher.subscribe(EventId.GAME_RESTART, self._on_game_restart)
         self._event_dispatcher.subscribe(EventId.NEXT_LEVEL, self._on_next_level)
+        self._event_dispatcher.subscribe(EventId.SWITCH_TIMEOUT, self._on_switch_timeout)
 
     def _init_menu(self):
         menu = Menu()
@@ -113,7 +135,7 @@ class GameDriver:
 
         def plan_start():
             self.mode = self.Mode.WAIT
-            self._scheduler.schedule(250, EventId.GAME_START)
+            self._scheduler.schedule(self.start_delay, EventId.GAME_START)
         # todo esc redefine
         menu.pause_item.add_item('continue', None, False, plan_start)
         menu.pause_item.add_item('save', menu.save_item, True)
@@ -150,15 +172,7 @@ class GameDriver:
             'ok',
             menu.root_item,
             False,
-            lambda: self._resources.add_rating(
-                ''.join(
-                    map(
-                        lambda i: self._config['gameplay']['symbols'][i],
-                        menu.record_item.cache['name']
-                    )
-                ),
-                self.scores
-            )
+            self._add_rating
         )
         menu.record_item.add_item('cancel', menu.root_item, False)
 
@@ -179,6 +193,8 @@ class GameDriver:
 
     def _reset(self):
         self._scheduler.reset()
+        if self._rewind:
+            self._rewind.clear()
         if self.field:
             for actor in self.field.actors.values():
                 actor.destroy()
@@ -193,7 +209,7 @@ class GameDriver:
 
     def get_size(self):
         match self.mode:
-            case self.Mode.PLAY:
+            case self.Mode.PLAY | self.Mode.REWIND:
                 return self.field.grid.size + Vector2(16, 0)
             case _:
                 return Vector2(
@@ -201,8 +217,12 @@ class GameDriver:
                     self._config['view']['default_height']
                 )
 
-    def new_game(self, difficulty, grid):
+    def new_game(self, difficulty, grid, seed=None):
         self._reset()
+        if seed is None:
+            seed = self._random.randint(0, 0xFFFFFFFF)
+        self.seed = seed
+        self._random.reset(seed)
         lives = self._config['gameplay']['start_lives']
         self._initiate(0, grid, difficulty, 1, 0, lives)
         self._event_dispatcher.fire(EventId.GAME_INIT, self)
@@ -210,8 +230,7 @@ class GameDriver:
             enemy_start_mode = Enemy.Mode.FREE
         elif difficulty == self.Difficulty.NORMAL:
             enemy_start_mode = Enemy.Mode.SCATTER
-            self._scheduler.schedule(1000, EventId.SWITCH_TIMEOUT)
-            self._event_dispatcher.subscribe(EventId.SWITCH_TIMEOUT, self._on_switch_timeout)
+            self._scheduler.schedule(self.switch_period, EventId.SWITCH_TIMEOUT)
         else:
             enemy_start_mode = Enemy.Mode.CHASE
         self.field.spawn_actor(
@@ -245,186 +264,105 @@ class GameDriver:
             (Enemy.Mode.NONE, enemy_start_mode, Enemy.Mode.HOME)
         )
         self.mode = self.Mode.WAIT
-        self._scheduler.schedule(250, EventId.GAME_START)
-        self._scheduler.schedule(300, EventId.PINK_GHOST_OUT)
-        self._scheduler.schedule(400, EventId.BLUE_GHOST_OUT)
-        self._scheduler.schedule(500, EventId.ORANGE_GHOST_OUT)
+        self._scheduler.schedule(self.start_delay, EventId.GAME_START)
+        for event_id, delay in self.ghost_out_delays.items():
+            self._scheduler.schedule(delay, event_id)
+
+    def _add_rating(self):
+        if not self.storage_enabled:
+            return
+        self._resources.add_rating(
+            ''.join(
+                map(
+                    lambda i: self._config['gameplay']['symbols'][i],
+                    self.menu.record_item.cache['name']
+                )
+            ),
+            self.scores,
+            self.grid,
+            self.difficulty.name,
+            self.level,
+            lambda error: self.menu.ratings_item.refresh()
+        )
 
     def load_game(self, save_index):
+        if not self.storage_enabled:
+            return
         save = self._resources.get_save(save_index)
+        if save is None:
+            return
         self._reset()
-        time = save['game']['time']
-        grid = save['game']['grid']
-        difficulty = save['game']['difficulty']
-        level = save['game']['level']
-        scores = save['game']['scores']
-        lives = save['game']['lives']
-        self._initiate(time, grid, self.Difficulty[difficulty],
-                       level, scores, lives)
-        self._dots = save['game']['dots']
-        self._scheduler.load(save['scheduler'])
-        for cell in save['blocks']:
-            cell_p = Vector2(*map(int, cell.split(',')))
-            self.field.grid[cell_p].content = Block.Content[
-                save['blocks'][cell]
-            ]
-        self.field.spawn_actor(
-            Pacman,
-            Vector2(*map(float, save['pacman']['position'].split(','))),
-            Direction[save['pacman']['direction']],
-            (
-                Pacman.Mode[save['pacman']['mode1']],
-                Pacman.Mode[save['pacman']['mode2']]
-            )
-        )
-        if save['pacman']['last_turn'] != 'None':
-            self.field.actors['pacman'].last_turn = Vector2(
-                *map(float, save['pacman']['last_turn'].split(','))
-            )
-        self.field.spawn_actor(
-            RedGhost,
-            Vector2(*map(float, save['red_ghost']['position'].split(','))),
-            Direction[save['red_ghost']['direction']],
-            (
-                Enemy.Mode[save['red_ghost']['mode1']],
-                Enemy.Mode[save['red_ghost']['mode2']],
-                Enemy.Mode[save['red_ghost']['mode3']],
-            )
-        )
-        if save['red_ghost']['last_turn'] != 'None':
-            self.field.actors['red_ghost'].last_turn = Vector2(
-                *map(float, save['red_ghost']['last_turn'].split(','))
-            )
-        if save['red_ghost']['last_node'] != 'None':
-            self.field.actors['red_ghost'].last_node = save['red_ghost'][
-                'last_node'
-            ]
-        self.field.spawn_actor(
-            PinkGhost,
-            Vector2(*map(float, save['pink_ghost']['position'].split(','))),
-            Direction[save['pink_ghost']['direction']],
-            (
-                Enemy.Mode[save['pink_ghost']['mode1']],
-                Enemy.Mode[save['pink_ghost']['mode2']],
-                Enemy.Mode[save['pink_ghost']['mode3']],
+        snapshot = save.snapshot
+        self._initiate(snapshot.time, save.grid, self.Difficulty[save.difficulty],
+                       snapshot.level, snapshot.scores, snapshot.lives)
+        self.seed = save.seed
+        for name, actor_cls in zip(
+                SaveGame.actor_names,
+                (Pacman, RedGhost, PinkGhost, BlueGhost, OrangeGhost)
+        ):
+            actor = snapshot.actors[name]
+            self.field.spawn_actor(
+                actor_cls, Vector2(actor[0], actor[1]), actor[2], actor[7:10]
             )
-        )
-        if save['pink_ghost']['last_turn'] != 'None':
-            self.field.actors['pink_ghost'].last_turn = Vector2(
-                *map(float, save['pink_ghost']['last_turn'].split(','))
-            )
-        if save['pink_ghost']['last_node'] != 'None':
-            self.field.actors['pink_ghost'].last_node = save['pink_ghost'][
-                'last_node'
-            ]
-        self.field.spawn_actor(
-            BlueGhost,
-            Vector2(*map(float, save['blue_ghost']['position'].split(','))),
-            Direction[save['blue_ghost']['direction']],
-            (
-                Enemy.Mode[save['blue_ghost']['mode1']],
-                Enemy.Mode[save['blue_ghost']['mode2']],
-                Enemy.Mode[save['blue_ghost']['mode3']],
-            )
-        )
-        if save['blue_ghost']['last_turn'] != 'None':
-            self.field.actors['blue_ghost'].last_turn = Vector2(
-                *map(float, save['blue_ghost']['last_turn'].split(','))
-            )
-        if save['blue_ghost']['last_node'] != 'None':
-            self.field.actors['blue_ghost'].last_node = save['blue_ghost'][
-                'last_node'
-            ]
-        self.field.spawn_actor(
-            OrangeGhost,
-            Vector2(*map(float, save['orange_ghost']['position'].split(','))),
-            Direction[save['orange_ghost']['direction']],
-            (
-                Enemy.Mode[save['orange_ghost']['mode1']],
-                Enemy.Mode[save['orange_ghost']['mode2']],
-                Enemy.Mode[save['orange_ghost']['mode3']],
-            )
-        )
-        if save['orange_ghost']['last_turn'] != 'None':
-            self.field.actors['orange_ghost'].last_turn = Vector2(
-                *map(float, save['orange_ghost']['last_turn'].split(','))
-            )
-        if save['orange_ghost']['last_node'] != 'None':
-            self.field.actors['orange_ghost'].last_node = save['orange_ghost'][
-                'last_node'
-            ]
+        self._restore_snapshot(snapshot)
         self.mode = self.Mode.WAIT
-        self._scheduler.schedule(250, EventId.GAME_START)
+        self._scheduler.schedule(self.start_delay, EventId.GAME_START)
 
-    def save_game(self, save_index):
-        if self.mode not in (self.Mode.PLAY, self.Mode.MENU):
+    def save_game(self, save_index, callback=None):
+        if not self.storage_enabled or self.mode not in (self.Mode.PLAY, self.Mode.MENU):
             return
         mode = self.mode
         self.mode = self.Mode.PAUSE
-        save = {
-            'info': {
-                'date': datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S'),
-            },
-            'game': {
-                'time': self.time,
-                'grid': self.grid,
-                'difficulty': self.difficulty.name,
-                'level': self.level,
-                'scores': self.scores,
-                'lives': self.lives,
-                'dots': self._dots
-            },
-            'scheduler': self._scheduler.store(),
-            'blocks': {
-                block.cell: block.content.name for block in self.field.grid
-            },
-            'pacman': {
-                'position': self.field.actors['pacman'].position,
-                'direction': self.field.actors['pacman'].direction.name,
-                'mode1': self.field.actors['pacman'].mode[0].name,
-                'mode2': self.field.actors['pacman'].mode[1].name,
-                'last_turn': str(self.field.actors['pacman'].last_turn),
-            },
-            'red_ghost': {
-                'position': self.field.actors['red_ghost'].position,
-                'direction': self.field.actors['red_ghost'].direction.name,
-                'mode1': self.field.actors['red_ghost'].mode[0].name,
-                'mode2': self.field.actors['red_ghost'].mode[1].name,
-                'mode3': self.field.actors['red_ghost'].mode[2].name,
-                'last_turn': str(self.field.actors['red_ghost'].last_turn),
-                'last_node': str(self.field.actors['red_ghost'].last_node),
-            },
-            'pink_ghost': {
-                'position': self.field.actors['pink_ghost'].position,
-                'direction': self.field.actors['pink_ghost'].direction.name,
-                'mode1': self.field.actors['pink_ghost'].mode[0].name,
-                'mode2': self.field.actors['pink_ghost'].mode[1].name,
-                'mode3': self.field.actors['pink_ghost'].mode[2].name,
-                'last_turn': str(self.field.actors['pink_ghost'].last_turn),
-                'last_node': str(self.field.actors['pink_ghost'].last_node),
-            },
-            'blue_ghost': {
-                'position': self.field.actors['blue_ghost'].position,
-                'direction': self.field.actors['blue_ghost'].direction.name,
-                'mode1': self.field.actors['blue_ghost'].mode[0].name,
-                'mode2': self.field.actors['blue_ghost'].mode[1].name,
-                'mode3': self.field.actors['blue_ghost'].mode[2].name,
-                'last_turn': str(self.field.actors['blue_ghost'].last_turn),
-                'last_node': str(self.field.actors['blue_ghost'].last_node),
-            },
-            'orange_ghost': {
-                'position': self.field.actors['orange_ghost'].position,
-                'direction': self.field.actors['orange_ghost'].direction.name,
-                'mode1': self.field.actors['orange_ghost'].mode[0].name,
-                'mode2': self.field.actors['orange_ghost'].mode[1].name,
-                'mode3': self.field.actors['orange_ghost'].mode[2].name,
-                'last_turn': str(self.field.actors['orange_ghost'].last_turn),
-                'last_node': str(self.field.actors['orange_ghost'].last_node),
-            }
-        }
-        self._resources.add_save(save_index, save)
+        save = SaveGame(
+            datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S'),
+            self.grid,
+            self.difficulty.name,
+            self.seed,
+            self._store_snapshot()
+        )
+        self._resources.add_save(save_index, save, callback)
         self.mode = mode
 
+    def _store_snapshot(self):
+        return GameSnapshot(
+            self.mode,
+            self.time,
+            self.level,
+            self.scores,
+            self.lives,
+            self._dots,
+            self._scheduler.snapshot(),
+            self._random.snapshot(),
+            self.field.grid.store_content(),
+            {name: actor.snapshot() for name, actor in self.field.actors.items()}
+        )
+
+    def _restore_snapshot(self, snapshot):
+        self.time = snapshot.time
+        self.level = snapshot.level
+        self.scores = snapshot.scores
+        self.lives = snapshot.lives
+        self._dots = snapshot.dots
+        self._scheduler.restore(snapshot.scheduler)
+        if snapshot.random is not None:
+            self._random.restore(snapshot.random)
+        self.field.grid.restore_content(snapshot.content)
+        for name, actor_snapshot in snapshot.actors.items():
+            self.field.actors[name].restore(actor_snapshot)
+
+    def _step_rewind(self, delta):
+        snapshot = self._rewind.step(delta)
+        if snapshot is None:
+            return
+        self._restore_snapshot(snapshot)
+        self._scheduler.reset()
+        self.mode = self.Mode.REWIND
+
+    def _resume_rewind(self):
+        snapshot = self._rewind.resume()
+        self._restore_snapshot(snapshot)
+        self.mode = snapshot.mode
+
     def _on_next_level(self, event_args):
         for actor in self.field.actors.values():
             actor.destroy()
@@ -440,8 +378,7 @@ class GameDriver:
             enemy_start_mode = Enemy.Mode.FREE
         elif self.difficulty == self.Difficulty.NORMAL:
             enemy_start_mode = Enemy.Mode.SCATTER
-            self._scheduler.schedule(1000, EventId.SWITCH_TIMEOUT)
-            self._event_dispatcher.subscribe(EventId.SWITCH_TIMEOUT, self._on_switch_timeout)
+            self._scheduler.schedule(self.switch_period, EventId.SWITCH_TIMEOUT)
         else:
             enemy_start_mode = Enemy.Mode.CHASE
         self.field.spawn_actor(
@@ -475,10 +412,9 @@ class GameDriver:
             (Enemy.Mode.NONE, enemy_start_mode, Enemy.Mode.HOME)
         )
         self.mode = self.Mode.WAIT
-        self._scheduler.schedule(250, EventId.GAME_START)
-        self._scheduler.schedule(300, EventId.PINK_GHOST_OUT)
-        self._scheduler.schedule(400, EventId.BLUE_GHOST_OUT)
-        self._scheduler.schedule(500, EventId.ORANGE_GHOST_OUT)
+        self._scheduler.schedule(self.start_delay, EventId.GAME_START)
+        for event_id, delay in self.ghost_out_delays.items():
+            self._scheduler.schedule(delay, event_id)
 
     def _on_game_start(self, event_id):
         self.mode = self.Mode.PLAY
@@ -506,6 +442,8 @@ class GameDriver:
             self.field.update()
         elif self.mode == self.Mode.FREE:
             self.field.update()
+        if self._rewind is not None and self.mode in (self.Mode.PLAY, self.Mode.FREE):
+            self._rewind.push(self._store_snapshot())
         self._event_dispatcher.fire(EventId.MODEL_UPDATE, self, model=self)
 
     def _on_control(self, event_args):
@@ -529,6 +467,18 @@ class GameDriver:
                 self.mode = self.Mode.MENU
             if event_args.value == InputUid.SAVE:
                 self.save_game('quick')
+            if event_args.value == InputUid.REWIND and self._rewind is not None:
+                self._step_rewind(-self._config['debug']['rewind_step'])
+        elif self.mode == self.Mode.FREE:
+            if event_args.value == InputUid.REWIND and self._rewind is not None:
+                self._step_rewind(-self._config['debug']['rewind_step'])
+        elif self.mode == self.Mode.REWIND:
+            if event_args.value == InputUid.REWIND:
+                self._step_rewind(-self._config['debug']['rewind_step'])
+            elif event_args.value == InputUid.FORWARD:
+                self._step_rewind(self._config['debug']['rewind_step'])
+            elif event_args.value in (InputUid.ENTER, InputUid.EXIT):
+                self._resume_rewind()
         elif self.mode in (self.Mode.WIN, self.Mode.LOSE):
             self.menu.current_page = self.menu.record_item
             self.mode = self.Mode.MENU
@@ -542,13 +492,13 @@ class GameDriver:
             self._event_dispatcher.fire(EventId.DESTROY, self)
 
     def _on_switch_timeout(self, event_args):
-        self._scheduler.schedule(1000, EventId.SWITCH_TIMEOUT)
+        self._scheduler.schedule(self.switch_period, EventId.SWITCH_TIMEOUT)
 
     def _on_pickup(self, event_args):
         if event_args.pickup == Block.Content.ENERGIZER:
             self.scores += 100
-            self._scheduler.schedule(600, EventId.FRIGHTENED_TIMEOUT)
-            self._scheduler.schedule(800, EventId.ENERGIZER_TIMEOUT)
+            self._scheduler.schedule(self.frightened_duration, EventId.FRIGHTENED_TIMEOUT)
+            self._scheduler.schedule(self.energizer_duration, EventId.ENERGIZER_TIMEOUT)
         elif event_args.pickup == Block.Content.DOT:
             self.scores += 10
             self._dots -= 1
@@ -82,10 +82,37 @@ class RatingsItem(PageItem):
     def __init__(self, services, title):
         super().__init__(title)
         self._services = services
+        self._page_size = services[AbstractConfig]['common']['max_ratings']
+        self.page = 0
+        self._ratings = None
+
+    @property
+    def offset(self):
+        return self.page * self._page_size
 
     @property
     def ratings(self):
-        return self._services[ResourceManager].get_rating_list()
+        if self._ratings is None:
+            self._ratings = self._services[ResourceManager].get_rating_list(page=self.page)
+        return self._ratings
+
+    def left(self):
+        if self.page > 0:
+            self.page -= 1
+            self._ratings = None
+
+    def right(self):
+        if len(self.ratings) == self._page_size:
+            self.page += 1
+            self._ratings = None
+
+    def reset(self):
+        super().reset()
+        self.page = 0
+        self._ratings = None
+
+    def refresh(self):
+        self._ratings = None
 
 
 class SaveItem(PageItem):
@@ -95,6 +122,7 @@ class SaveItem(PageItem):
         self._services = services
         self._items = []
         self._save_func = save_func
+        self._failed = set()
 
     @property
     def items(self):
@@ -102,10 +130,10 @@ class SaveItem(PageItem):
             chain(
                 (
                     (
-                        str(i) + '. ' + s['info']['date'] if s else 'empty',
+                        str(i) + '. ' + self._get_status(i, s),
                         None,
                         True,
-                        lambda i_=i: self._save_func(i_)
+                        lambda i_=i: self._save(i_)
                     )
                     for i, s in self._services[ResourceManager].list_saves()
                 ),
@@ -113,6 +141,21 @@ class SaveItem(PageItem):
             )
         )
 
+    def _get_status(self, index, save):
+        if self._services[ResourceManager].is_save_pending(index):
+            return 'saving...'
+        if index in self._failed:
+            return 'save failed'
+        return save.date if save else 'empty'
+
+    def _save(self, index):
+        self._failed.discard(index)
+        self._save_func(index, lambda error: self._on_saved(index, error))
+
+    def _on_saved(self, index, error):
+        if error:
+            self._failed.add(index)
+
     @items.setter
     def items(self, value):
         pass
@@ -135,7 +178,7 @@ class LoadItem(PageItem):
             chain(
                 (
                     (
-                        save['info']['date'],
+                        save.date,
                         None,
                         False,
                         lambda idx=index: self._load_func(idx)
@@ -0,0 +1,142 @@
+import math
+from abc import ABC, abstractmethod
+
+
+UNITS_PER_CELL = 1000
+# float positions drift by a few ulps per step; comparisons absorb it so that
+# float and fixed movement agree on exact ties
+POSITION_TOLERANCE = 1e-9
+
+
+class AbstractMovement(ABC):
+
+    # actors stop in front of a wall once they are this close to the cell centre
+    stop_distance = 0.06
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    @abstractmethod
+    def place(self, actor):
+        pass
+
+    @abstractmethod
+    def update(self, actor):
+        pass
+
+    @abstractmethod
+    def at_center(self, actor, epsilon):
+        pass
+
+    @abstractmethod
+    def reached(self, actor, point, epsilon):
+        pass
+
+    @abstractmethod
+    def align(self, actor):
+        pass
+
+    @abstractmethod
+    def align_to(self, actor, point):
+        pass
+
+
+class FloatMovement(AbstractMovement):
+
+    def place(self, actor):
+        pass
+
+    def update(self, actor):
+        position = actor.position
+        if actor.center_distance() < self.stop_distance - POSITION_TOLERANCE:
+            if not self.grid.is_open(
+                    math.floor(position.x + POSITION_TOLERANCE),
+                    math.floor(position.y + POSITION_TOLERANCE),
+                    actor.direction
+            ):
+                return
+        offset_x, offset_y = actor.direction.to_offset()
+        speed = actor.speed
+        position.x += speed * offset_x
+        position.y += speed * offset_y
+        position.x %= self.grid.size.x
+        position.y %= self.grid.size.y
+
+    def at_center(self, actor, epsilon):
+        return actor.center_distance() < epsilon - POSITION_TOLERANCE
+
+    def reached(self, actor, point, epsilon):
+        return actor.position.distance(point) < epsilon - POSITION_TOLERANCE
+
+    def align(self, actor):
+        pass
+
+    def align_to(self, actor, point):
+        pass
+
+
+class FixedMovement(AbstractMovement):
+
+    # same rules as FloatMovement, on integer units instead of accumulated floats
+
+    def __init__(self, grid):
+        super().__init__(grid)
+        self._span_x = grid.size.x * UNITS_PER_CELL
+        self._span_y = grid.size.y * UNITS_PER_CELL
+        self._stop_distance_squared = self._squared_units(self.stop_distance)
+
+    def place(self, actor):
+        actor.units_x = round(actor.position.x * UNITS_PER_CELL) % self._span_x
+        actor.units_y = round(actor.position.y * UNITS_PER_CELL) % self._span_y
+        actor.last_units_x = actor.units_x
+        actor.last_units_y = actor.units_y
+        self._sync(actor)
+
+    def update(self, actor):
+        x = actor.last_units_x = actor.units_x
+        y = actor.last_units_y = actor.units_y
+        if self._center_distance_squared(x, y) < self._stop_distance_squared:
+            if not self.grid.is_open(x // UNITS_PER_CELL, y // UNITS_PER_CELL, actor.direction):
+                return
+        speed = round(actor.speed * UNITS_PER_CELL)
+        offset_x, offset_y = actor.direction.to_offset()
+        actor.units_x = (x + offset_x * speed) % self._span_x
+        actor.units_y = (y + offset_y * speed) % self._span_y
+        self._sync(actor)
+
+    def at_center(self, actor, epsilon):
+        return (
+            self._center_distance_squared(actor.units_x, actor.units_y)
+            < self._squared_units(epsilon)
+        )
+
+    def reached(self, actor, point, epsilon):
+        dx = actor.units_x - round(point.x * UNITS_PER_CELL)
+        dy = actor.units_y - round(point.y * UNITS_PER_CELL)
+        return dx * dx + dy * dy < self._squared_units(epsilon)
+
+    def align(self, actor):
+        pass
+
+    def align_to(self, actor, point):
+        pass
+
+    def _sync(self, actor):
+        actor.position.x = actor.units_x / UNITS_PER_CELL
+        actor.position.y = actor.units_y / UNITS_PER_CELL
+
+    @staticmethod
+    def _squared_units(distance):
+        return round(distance * UNITS_PER_CELL) ** 2
+
+    @staticmethod
+    def _center_distance_squared(x, y):
+        dx = x % UNITS_PER_CELL - UNITS_PER_CELL // 2
+        dy = y % UNITS_PER_CELL - UNITS_PER_CELL // 2
+        return dx * dx + dy * dy
+
+
+def create_movement(model, grid):
+    if model == 'fixed':
+        return FixedMovement(grid)
+    return FloatMovement(grid)
@@ -0,0 +1,53 @@
+from collections import deque
+
+
+class GameSnapshot:
+
+    __slots__ = (
+        'mode', 'time', 'level', 'scores', 'lives', 'dots',
+        'scheduler', 'random', 'content', 'actors'
+    )
+
+    def __init__(self, mode, time, level, scores, lives, dots,
+                 scheduler, random, content, actors):
+        self.mode = mode
+        self.time = time
+        self.level = level
+        self.scores = scores
+        self.lives = lives
+        self.dots = dots
+        self.scheduler = scheduler
+        self.random = random
+        self.content = content
+        self.actors = actors
+
+
+class RewindBuffer:
+
+    def __init__(self, capacity):
+        self._snapshots = deque(maxlen=capacity)
+        self.cursor = -1
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def push(self, snapshot):
+        self._snapshots.append(snapshot)
+        self.cursor = len(self._snapshots) - 1
+
+    def step(self, delta):
+        if not self._snapshots:
+            return None
+        self.cursor = min(max(self.cursor + delta, 0), len(self._snapshots) - 1)
+        return self._snapshots[self.cursor]
+
+    def resume(self):
+        if not self._snapshots:
+            return None
+        while len(self._snapshots) > self.cursor + 1:
+            self._snapshots.pop()
+        return self._snapshots[self.cursor]
+
+    def clear(self):
+        self._snapshots.clear()
+        self.cursor = -1
@@ -0,0 +1,239 @@
+import json
+import logging
+import struct
+from collections import defaultdict
+
+from library.config import AbstractConfig
+from library.events import EventId, EventDispatcher
+from library.exceptions import ResourceLoadingError
+from library.model.control import InputUid
+
+
+class Replay:
+
+    magic = b'PMRP'
+    version = 1
+
+    # magic, version, seed, difficulty, length, time, scores, level, lives, control count
+    _header = struct.Struct('<4sHQBIIIIII')
+    _grid_name_length = struct.Struct('<B')
+    _rules_length = struct.Struct('<H')
+    _control = struct.Struct('<IB')
+
+    # config options that change the simulation, section and key
+    rule_options = (
+        ('gameplay', 'dot_count'),
+        ('gameplay', 'max_level'),
+        ('gameplay', 'start_lives'),
+        ('gameplay', 'movement_model'),
+        ('gameplay', 'ghost_targeting'),
+        ('debug', 'is_god_mode'),
+        # rewind controls only act in debug mode
+        ('debug', 'is_debug'),
+        ('debug', 'rewind_ticks'),
+        ('debug', 'rewind_step')
+    )
+
+    def __init__(self, grid, difficulty, seed, rules, controls=None, length=0, summary=(0, 0, 0, 0)):
+        self.grid = grid
+        self.difficulty = difficulty
+        self.seed = seed
+        self.rules = rules
+        self.controls = controls if controls is not None else []
+        self.length = length
+        self.summary = summary
+
+    def to_bytes(self):
+        grid_name = self.grid.encode()
+        rules = json.dumps(self.rules).encode()
+        chunks = [
+            self._header.pack(
+                self.magic, self.version, self.seed, self.difficulty,
+                self.length, *self.summary, len(self.controls)
+            ),
+            self._grid_name_length.pack(len(grid_name)),
+            grid_name,
+            self._rules_length.pack(len(rules)),
+            rules
+        ]
+        for offset, input_uid in self.controls:
+            chunks.append(self._control.pack(offset, input_uid.value))
+        return b''.join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, version, seed, difficulty, length, *rest = cls._header.unpack_from(data)
+            summary, count = tuple(rest[:4]), rest[4]
+            if magic != cls.magic or version != cls.version:
+                raise ResourceLoadingError(False, message='Unsupported replay format')
+            position = cls._header.size
+            grid_name_length, = cls._grid_name_length.unpack_from(data, position)
+            position += cls._grid_name_length.size
+            grid = data[position:position + grid_name_length].decode()
+            position += grid_name_length
+            rules_length, = cls._rules_length.unpack_from(data, position)
+            position += cls._rules_length.size
+            rules = json.loads(data[position:position + rules_length])
+            position += rules_length
+            controls = []
+            for _ in range(count):
+                offset, input_uid = cls._control.unpack_from(data, position)
+                controls.append((offset, InputUid(input_uid)))
+                position += cls._control.size
+        except (struct.error, UnicodeDecodeError, ValueError, TypeError):
+            raise ResourceLoadingError(False, message='Corrupted replay file')
+        if not isinstance(rules, dict):
+            raise ResourceLoadingError(False, message='Corrupted replay file')
+        missing = [
+            f'{section}.{key}' for section, key in cls.rule_options
+            if f'{section}.{key}' not in rules
+        ]
+        if missing:
+            raise ResourceLoadingError(
+                False, message=f'Replay does not record {", ".join(missing)}'
+            )
+        return cls(grid, difficulty, seed, rules, controls, length, summary)
+
+    def mismatched_rules(self, config):
+        return [
+            (section, key) for section, key in self.rule_options
+            if config[section][key] != self.rules[f'{section}.{key}']
+        ]
+
+    def apply_rules(self, config):
+        for section, key in self.mismatched_rules(config):
+            value = self.rules[f'{section}.{key}']
+            logging.info(f'Replay sets {section}.{key} to {value} instead of {config[section][key]}')
+            config[section][key] = value
+
+    def write(self, path):
+        with open(path, 'wb') as replay_file:
+            replay_file.write(self.to_bytes())
+
+    @classmethod
+    def read(cls, path):
+        try:
+            with open(path, 'rb') as replay_file:
+                data = replay_file.read()
+        except OSError:
+            raise ResourceLoadingError(False, message=f'Can\'t read replay file {path}')
+        return cls.from_bytes(data)
+
+
+def _summarize(model):
+    return model.time, model.scores, model.level, model.lives
+
+
+class ReplayRecorder:
+
+    def __init__(self, services, path_factory):
+        self._event_dispatcher = services[EventDispatcher]
+        self._config = services[AbstractConfig]
+        self._path_factory = path_factory
+        self._replay = None
+        self._start_time = 0
+        self._last_time = 0
+        self._event_dispatcher.subscribe(EventId.TICK, self._on_tick)
+        self._event_dispatcher.subscribe(EventId.CONTROL, self._on_control, -1)
+        self._event_dispatcher.subscribe(EventId.GAME_INIT, self._on_game_init)
+        self._event_dispatcher.subscribe(EventId.MODEL_UPDATE, self._on_model_update)
+        self._event_dispatcher.subscribe(EventId.DESTROY, self._on_destroy)
+
+    def _on_tick(self, event_args):
+        self._last_time = event_args.time
+
+    def _on_control(self, event_args):
+        if self._replay is not None:
+            self._replay.controls.append((self._last_time - self._start_time, event_args.value))
+
+    def _on_game_init(self, event_args):
+        self.finish()
+        model = event_args.sender
+        rules = {
+            f'{section}.{key}': self._config[section][key]
+            for section, key in Replay.rule_options
+        }
+        self._replay = Replay(model.grid, model.difficulty.value, model.seed, rules)
+        self._start_time = self._last_time
+
+    def _on_model_update(self, event_args):
+        if self._replay is None:
+            return
+        model = event_args.model
+        self._replay.length = self._last_time - self._start_time
+        self._replay.summary = _summarize(model)
+        if model.mode in (model.Mode.WIN, model.Mode.LOSE):
+            self.finish()
+
+    def _on_destroy(self, event_args):
+        self.finish()
+
+    def finish(self):
+        if self._replay is None:
+            return
+        replay = self._replay
+        self._replay = None
+        path = self._path_factory()
+        try:
+            replay.write(path)
+        except OSError as exc:
+            logging.error(exc)
+            return
+        logging.info(f'Replay of {replay.length} ticks saved to {path}')
+
+
+class ReplayPlayer:
+
+    def __init__(self, services, game_driver, replay):
+        self._event_dispatcher = services[EventDispatcher]
+        self._config = services[AbstractConfig]
+        self._game_driver = game_driver
+        # a replay must not touch save slots or ratings
+        self._game_driver.storage_enabled = False
+        self.replay = replay
+        self._controls = defaultdict(list)
+        for offset, input_uid in replay.controls:
+            self._controls[offset].append(input_uid)
+        self._start_time = None
+        self.finished = False
+        self.reproduced = None
+        self._event_dispatcher.subscribe(EventId.TICK, self._on_tick, 3)
+
+    def _on_tick(self, event_args):
+        if self.finished:
+            return
+        if self._start_time is None:
+            self._start_time = event_args.time
+            mismatched = self.replay.mismatched_rules(self._config)
+            if mismatched:
+                self.finished = True
+                self.reproduced = False
+                for section, key in mismatched:
+                    logging.error(
+                        f'Replay config mismatch: {section}.{key} is {self._config[section][key]}, '
+                        f'recorded {self.replay.rules[f"{section}.{key}"]}'
+                    )
+                self._event_dispatcher.fire(EventId.DESTROY, self)
+                return
+            self._game_driver.new_game(
+                self._game_driver.Difficulty(self.replay.difficulty),
+                self.replay.grid,
+                self.replay.seed
+            )
+        offset = event_args.time - self._start_time
+        if offset >= self.replay.length:
+            self._finish()
+            return
+        for input_uid in self._controls.get(offset, ()):
+            self._event_dispatcher.fire(EventId.CONTROL, self, value=input_uid)
+
+    def _finish(self):
+        self.finished = True
+        summary = _summarize(self._game_driver)
+        self.reproduced = summary == self.replay.summary
+        if self.reproduced:
+            logging.info(f'Replay reproduced: {self.replay.length} ticks, {summary[1]} scores')
+        else:
+            logging.warning(f'Replay diverged: expected {self.replay.summary}, got {summary}')
+        self._event_dispatcher.fire(EventId.DESTROY, self)
@@ -1,23 +1,39 @@
-import configparser
+import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from itertools import chain
-from os import listdir, getcwd, path as paths
-from collections import defaultdict
+from os import listdir, getcwd, makedirs, stat, path as paths
 import json
+import wave
 
 from library.animation import Animation, AnimationState, AnimationTrack, AnimationKeyFrame, AnimationStateParams
 from library.config import AbstractConfig
+from library.events import EventDispatcher
 
 try:
     from simpleaudio import WaveObject
 except ModuleNotFoundError:
     WaveObject = None
-from PIL import Image, ImageTk
+try:
+    from PIL import Image, ImageTk
+except ModuleNotFoundError:
+    Image = ImageTk = None
 
+from library.bundle import ResourceBundle, collect_sources
+from library.cache import CacheRegistry
 from library.exceptions import ResourceLoadingError
-from library.geometry import Vector2, Direction
-from library.graphics import Sprite
-from library.model.field import Block, Grid
+from library.framebuffer import blit
+from library.geometry import Vector2
+from library.drawers import Sprite
+from library.io_worker import IoWorker
+from library.lazy import LazyStore
+from library.time import Stopwatch
+from library.leaderboard import Leaderboard
+from library.model.autotile import compute_wall_tiles
+from library.model.distances import create_distance_table
+from library.model.field import Block, CompactGrid, Grid, GridTemplate, JunctionGraph
+from library.save import SaveGame, SaveInfo
 
 
 class ResourceManager:
@@ -29,9 +45,16 @@ class ResourceManager:
     _sound_path = paths.join(_resource_path, 'sounds')
     _data_path = paths.join(getcwd(), 'data')
     _ratings_path = paths.join(_data_path, 'ratings.json')
+    _leaderboard_path = paths.join(_data_path, 'ratings.db')
+    _tint_cache_path = paths.join(_data_path, 'tints.pmb')
     _saves_path = paths.join(_data_path, 'saves')
+    _save_index_path = paths.join(_saves_path, 'index.json')
+    _replays_path = paths.join(_data_path, 'replays')
     _symbol_mapping_path = paths.join(_resource_path, 'symbol_mapping.json')
     _sprite_library_path = paths.join(_resource_path, 'sprite_library.json')
+    _bundle_path = paths.join(_resource_path, 'bundle.pmb')
+    _bundle_sources = (_grid_path, _texture_path, _animation_path, _sound_path)
+    _ghost_texture = 'ghost'
 
     _block_types = {
         # content, anchor, can enter
@@ -57,41 +80,82 @@ class ResourceManager:
         self._config = services[AbstractConfig]
         self._max_save_count = self._config['common']['max_saves']
         self._max_rating_count = self._config['common']['max_ratings']
+        self._io_worker = IoWorker(services[EventDispatcher])
+        self._executor = ThreadPoolExecutor(thread_name_prefix='resources')
+        caches = services[CacheRegistry]
         self._grids = {}
-        self._sprites = {}
-        self._colored_sprite_cache = {}
-        self._animations = {}
-        self._sounds = {}
-        self._ratings = []
-        self._saves = {
-            key: defaultdict(dict)
-            for key in chain(range(self._max_save_count), ('quick',))
-        }
+        self._grid_templates = caches.create('grids')
+        self._distance_tables = caches.create('distances')
+        self._sprites = LazyStore(self._executor, self._decode_texture)
+        self._colored_sprite_cache = caches.create('sprites', self._estimate_sprite_size)
+        self._tinted_images = caches.create('tints', self._estimate_images_size)
+        self._text_sprites = caches.create('texts', self._estimate_sprite_size)
+        self._tint_cache_dirty = False
+        self._bundle = None
+        self._animations = LazyStore(self._executor, self._decode_animation)
+        self._sounds = LazyStore(self._executor, self._decode_sound)
+        self._leaderboard = None
+        self._save_slots = tuple(chain(range(self._max_save_count), ('quick',)))
+        self._saves = {}
+        self._save_infos = {}
+        self._save_index = {}
+        self._save_list = None
         self._symbol_map = {}
         self._sprite_library = {}
 
         self._fallback_animation = None
 
-    def load(self):
-        loads = (
-            self._load_grids,
-            self._load_textures,
-            self._load_animations,
-            self._load_sounds,
-            self._load_ratings,
-            self._load_saves,
-            self._load_symbol_mapping,
-            self._load_sprite_library,
-        )
-        for load in loads:
-            try:
-                load()
-            except ResourceLoadingError as exc:  # todo
-                logging.error(exc)
-                if exc.critical:
-                    return False
+    def load(self, headless=False):
+        if headless:
+            loads = (
+                self._load_grids,
+                self._load_saves,
+                self._load_symbol_mapping,
+                self._load_sprite_library,
+            )
+        else:
+            loads = (
+                self._load_grids,
+                self._load_textures,
+                self._load_animations,
+                self._load_sounds,
+                self._load_saves,
+                self._load_symbol_mapping,
+                self._load_sprite_library,
+            )
+        # sqlite connections are bound to the thread that opened them
+        main_thread_loads = (self._load_ratings,)
+        with Stopwatch() as stopwatch:
+            errors = [self._run_load(self._timed_load, self._load_bundle)]
+            futures = [self._executor.submit(self._timed_load, load) for load in loads]
+            errors += [self._run_load(self._timed_load, load) for load in main_thread_loads]
+            errors += [self._run_load(future.result) for future in futures]
+        logging.info(f'Resources loaded in {stopwatch.result_ms:.1f} ms')
+        for exc in errors:
+            if exc is None:
+                continue
+            logging.error(exc)
+            if exc.critical:
+                return False
         return True
 
+    @staticmethod
+    def _run_load(function, *args):
+        try:
+            function(*args)
+        except ResourceLoadingError as exc:  # todo
+            return exc
+        return None
+
+    @staticmethod
+    def _timed_load(load):
+        stopwatch = Stopwatch()
+        try:
+            with stopwatch:
+                load()
+        finally:
+            logging.info(f'{load.__name__} took {stopwatch.result_ms:.1f} ms')
+
     def _get_fallback_sprite(self):
         if not self._fallback_sprite:
             texture_width = self._config['view']['px_per_unit']
@@ -105,77 +169,184 @@ class ResourceManager:
                         color = (255, 0, 255)
                     image.putpixel((i, j), color)
 
-            texture = ImageTk.PhotoImage(image)
+            texture = self._create_texture(image)
             self._fallback_sprite = Sprite(texture)
         return self._fallback_sprite
 
     _fallback_sprite = None
 
     def _load_textures(self):
+        if not Image:
+            raise ResourceLoadingError(True, message='Image library is not found')
+
+        if self._bundle:
+            for name, images in self._bundle.textures.items():
+                self._sprites.set(name, Sprite(*self._unpack_images(images)))
+            for key, images in self._bundle.tints.items():
+                self._tinted_images[key] = self._unpack_images(images)
+        else:
+            for file_name in listdir(self._texture_path):
+                if not file_name.endswith('.png'):
+                    continue
+                name = paths.splitext(paths.basename(file_name))[0]
+                self._sprites.register(name, paths.join(self._texture_path, file_name))
+        self._load_tint_cache()
+
+    def _decode_texture(self, path):
         texture_width = self._config['view']['px_per_unit'] * 2
         texture_height = self._config['view']['px_per_unit'] * 2
-        for file_name in listdir(self._texture_path):
-            if not file_name.endswith('.png'):
-                continue
-            try:
-                atlas = Image.open(paths.join(self._texture_path, file_name))
-            except OSError as exc:
-                raise ResourceLoadingError(True, *exc.args)
-            images = []
-            name = paths.splitext(paths.basename(file_name))[0]
-            for j in range(atlas.height // texture_height):
-                for i in range(atlas.width // texture_width):
-                    texture = atlas.crop(
-                        (
-                            i * texture_width,
-                            j * texture_height,
-                            (i + 1) * texture_width,
-                            (j + 1) * texture_height
-                        )
+        try:
+            atlas = Image.open(path)
+            atlas.load()
+        except OSError as exc:
+            raise ResourceLoadingError(True, message=f'Can\'t read texture {path}: {exc}')
+        images = []
+        for j in range(atlas.height // texture_height):
+            for i in range(atlas.width // texture_width):
+                texture = atlas.crop(
+                    (
+                        i * texture_width,
+                        j * texture_height,
+                        (i + 1) * texture_width,
+                        (j + 1) * texture_height
                     )
-                    images.append(texture)
-            self._sprites[name] = Sprite(*images)
+                )
+                images.append(texture)
+        return Sprite(*images)
+
+    @staticmethod
+    def _tint_image(texture, color):
+        bands = [
+            band.point([int(value * factor) for value in range(256)])
+            for band, factor in zip(texture.convert('RGBA').split(), color)
+        ]
+        return Image.merge('RGBA', bands)
+
+    def _get_tinted_images(self, name, images, color):
+        tinted_images = self._tinted_images.get((name, color))
+        if tinted_images is None:
+            tinted_images = [self._tint_image(texture, color) for texture in images]
+            self._tinted_images[name, color] = tinted_images
+            self._tint_cache_dirty = True
+        return tinted_images
+
+    @staticmethod
+    def _estimate_images_size(images):
+        return sum(image.width * image.height * len(image.getbands()) for image in images)
+
+    def _estimate_sprite_size(self, sprite):
+        if self._config['view']['graphics_backend'] == 'framebuffer':
+            return self._estimate_images_size(sprite._images)
+        return sum(image.width() * image.height() * 4 for image in sprite._images)
+
+    def _get_tint_cache_sources(self):
+        return collect_sources(self._resource_path, (self._texture_path,))
+
+    def _load_tint_cache(self):
+        if not paths.exists(self._tint_cache_path):
+            return
+        try:
+            cache = ResourceBundle.read(self._tint_cache_path)
+        except ResourceLoadingError as exc:
+            logging.error(exc)
+            return
+        settings = {'px_per_unit': self._config['view']['px_per_unit']}
+        if not cache.is_valid(self._get_tint_cache_sources(), settings):
+            return
+        for key, images in cache.tints.items():
+            if key not in self._tinted_images:
+                self._tinted_images[key] = self._unpack_images(images)
+
+    def _write_tint_cache(self):
+        cache = ResourceBundle(
+            self._get_tint_cache_sources(),
+            {'px_per_unit': self._config['view']['px_per_unit']},
+            tints={
+                key: self._pack_images(images)
+                for key, images in self._tinted_images.items()
+            }
+        )
+        self._io_worker.write(self._tint_cache_path, cache.to_bytes())
+        self._tint_cache_dirty = False
+
+    @staticmethod
+    def _pack_images(images):
+        return images[0].mode, images[0].size, [image.tobytes() for image in images]
+
+    @staticmethod
+    def _unpack_images(data):
+        mode, size, tiles = data
+        return [Image.frombytes(mode, size, tile) for tile in tiles]
+
+    def _create_texture(self, image):
+        # the framebuffer backend composites PIL images itself
+        if self._config['view']['graphics_backend'] == 'framebuffer':
+            return image if image.mode == 'RGBA' else image.convert('RGBA')
+        return ImageTk.PhotoImage(image)
+
+    def render_layer(self, size, tiles):
+        layer = Image.new('RGBA', (int(size.x), int(size.y)))
+        for sprite_file, idx, position in tiles:
+            sprite = self._sprites.get(sprite_file)
+            if sprite:
+                blit(layer, sprite[idx], position.x, position.y)
+        return Sprite(self._create_texture(layer))
+
+    def get_text_sprite(self, text):
+        text_sprite = self._text_sprites.get(text)
+        if text_sprite is None:
+            glyphs = self._sprites.get('symbols')
+            if not glyphs:
+                return self._get_fallback_sprite()
+            advance = self._config['view']['px_per_unit'] * self._config['view']['scale']
+            tiles = [
+                ('symbols', self._symbol_map[ord(char)], Vector2(i * advance, 0))
+                for i, char in enumerate(text)
+                if char != ' '
+            ]
+            size = Vector2(advance * (len(text) - 1) + glyphs[0].width, glyphs[0].height)
+            text_sprite = self.render_layer(size, tiles)
+            self._text_sprites[text] = text_sprite
+        return text_sprite
 
     def get_sprite(self, name, color=None):
-        if name in self._sprites:
-            if (name, color) not in self._colored_sprite_cache.keys():
-                colored_images = []
-                sprite = self._sprites[name]
-                for texture in sprite._images:
-                    colored_texture = texture.copy()
-                    if color is not None:
-                        for i in range(texture.height):
-                            for j in range(texture.width):
-                                pixel = texture.getpixel((i, j))
-                                pixel = (
-                                    int(pixel[0] * color[0]),
-                                    int(pixel[1] * color[1]),
-                                    int(pixel[2] * color[2]),
-                                    int(pixel[3] * color[3])
-                                )
-                                colored_texture.putpixel((i, j), pixel)
-                    image = ImageTk.PhotoImage(colored_texture)
-                    colored_images.append(image)
-                colored_sprite = Sprite(*colored_images)
-                self._colored_sprite_cache[(name, color)] = colored_sprite
-            return self._colored_sprite_cache[(name, color)]
+        sprite = self._sprites.get(name)
+        if sprite:
+            colored_sprite = self._colored_sprite_cache.get((name, color))
+            if colored_sprite is None:
+                images = sprite._images
+                if color is not None:
+                    images = self._get_tinted_images(name, images, color)
+                colored_sprite = Sprite(*(self._create_texture(image) for image in images))
+                self._colored_sprite_cache[name, color] = colored_sprite
+            return colored_sprite
         else:
             return self._get_fallback_sprite()
 
     def _load_animations(self):
+        if self._bundle:
+            for name, text in self._bundle.animations.items():
+                self._animations.set(name, self._parse_animation(text))
+            return
         for file_name in listdir(self._animation_path):
             if not file_name.endswith('.json'):
                 continue
-            file_name = paths.join(self._animation_path, file_name)
             name = paths.splitext(paths.basename(file_name))[0]
-            data = None
-            try:
-                with open(file_name, 'r') as anim_file:
-                    data = anim_file.read()
-            except OSError as exc:
-                raise ResourceLoadingError(False, 'Can\'t read animation file')
-            animation = json.loads(data, object_hook=self._json_to_type)
-            self._animations[name] = animation
+            self._animations.register(name, paths.join(self._animation_path, file_name))
+
+    def _decode_animation(self, path):
+        return self._parse_animation(self._read_animation(path))
+
+    @staticmethod
+    def _read_animation(path):
+        try:
+            with open(path, 'r') as anim_file:
+                return anim_file.read()
+        except OSError:
+            raise ResourceLoadingError(False, message=f'Can\'t read animation file {path}')
+
+    def _parse_animation(self, data):
+        return json.loads(data, object_hook=self._json_to_type)
 
     def _json_to_type(self, json_obj):
         if 'type' in json_obj.keys() and json_obj['type'] in self._json_type_map.keys():
@@ -192,8 +363,9 @@ class ResourceManager:
         return self._fallback_animation
 
     def get_animation(self, name):
-        if name in self._animations:
-            return self._animations[name]
+        animation = self._animations.get(name)
+        if animation:
+            return animation
         return self._get_fallback_animation()
 
     def _load_symbol_mapping(self):
@@ -224,32 +396,68 @@ class ResourceManager:
         if not WaveObject:
             raise ResourceLoadingError(False, message='Sound engine is not found')
 
+        if self._bundle:
+            for name, (frames, channels, sample_width, frame_rate) in self._bundle.sounds.items():
+                self._sounds.set(name, WaveObject(frames, channels, sample_width, frame_rate))
+            return
         for file_name in listdir(self._sound_path):
             if not file_name.endswith('.wav'):
                 continue
-            file_name = paths.join(self._sound_path, file_name)
             name = paths.splitext(paths.basename(file_name))[0]
-            try:
-                self._sounds[name] = WaveObject.from_wave_file(file_name)
-            except OSError as exc:
-                raise ResourceLoadingError(False, *exc.args)
+            self._sounds.register(name, paths.join(self._sound_path, file_name))
+
+    @staticmethod
+    def _decode_sound(path):
+        try:
+            return WaveObject.from_wave_file(path)
+        except OSError as exc:
+            raise ResourceLoadingError(False, message=f'Can\'t read sound {path}: {exc}')
+
+    @staticmethod
+    def _read_wave(path):
+        try:
+            with wave.open(path, 'rb') as wave_file:
+                frames = wave_file.readframes(wave_file.getnframes())
+                return (
+                    frames,
+                    wave_file.getnchannels(),
+                    wave_file.getsampwidth(),
+                    wave_file.getframerate()
+                )
+        except (OSError, EOFError, wave.Error) as exc:
+            raise ResourceLoadingError(False, message=f'Can\'t read sound {path}: {exc}')
 
     def get_sound(self, sound_id):
-        return self._sounds.get(sound_id, None)
+        return self._sounds.get(sound_id)
+
+    def preload(self, names=None):
+        for store in (self._sprites, self._animations, self._sounds):
+            store.prefetch(store.names() if names is None else names)
+
+    def get_load_state(self, name):
+        for store in (self._sprites, self._animations, self._sounds):
+            if name in store:
+                return store.get_state(name)
+        return LazyStore.State.UNKNOWN
 
     def _load_grids(self):
-        for file_name in listdir(self._grid_path):
-            path = paths.join(self._grid_path, file_name)
-            try:
-                with open(path, encoding='utf-8') as fd:
-                    content = fd.read()
-            except OSError as exc:
-                raise ResourceLoadingError(False, *exc.args)
-            data = content.split('\n')
-            self._grids[file_name] = self._validate_grid_data(data, file_name)
+        if self._bundle:
+            self._grids.update(self._bundle.grids)
+        else:
+            for file_name in listdir(self._grid_path):
+                self._grids[file_name] = self._read_grid(file_name)
         if not self._grids:
             raise ResourceLoadingError(True, 'Can\'t load grids')
 
+    def _read_grid(self, file_name):
+        path = paths.join(self._grid_path, file_name)
+        try:
+            with open(path, encoding='utf-8') as fd:
+                content = fd.read()
+        except OSError as exc:
+            raise ResourceLoadingError(False, *exc.args)
+        return self._validate_grid_data(content.split('\n'), file_name)
+
     def _validate_grid_data(self, data, file_name):
         if len(data) == 0:
             raise ResourceLoadingError(False, f'Grid file {file_name} is empty')
@@ -278,108 +486,230 @@ class ResourceManager:
     def list_grids(self):
         return self._grids.keys()
 
-    def get_grid(self, grid_name):
+    def _create_grid_template(self, grid_name):
         data = self._grids[grid_name]
         size = Vector2(len(data[0]), len(data))
-        grid = Grid({}, size)
-        for i, line in enumerate(data):
-            for j, char in enumerate(line):
-                block_info = self._block_types[char]
-                connections = {}
-                for direction in Direction:
-                    o = direction.to_vector()
-                    i_o = (i + o.y) % size.y
-                    j_o = (j + o.x) % size.x
-                    try:
-                        connection = self._block_types[data[i_o][j_o]][2]
-                    except:
-                        pass
-                    connections[direction] = connection
-                cell = Vector2(j, i)
-                grid[cell] = Block(cell, block_info[0], connections)
-                if block_info[1]:
-                    grid.anchors[block_info[1]] = cell
+        block_types = [self._block_types[char] for line in data for char in line]
+        anchors = {}
+        for idx, (_, anchor, _) in enumerate(block_types):
+            if anchor:
+                anchors[anchor] = Vector2(idx % size.x, idx // size.x)
+        template = GridTemplate.build(
+            size,
+            [content for content, _, _ in block_types],
+            [can_enter for _, _, can_enter in block_types],
+            anchors
+        )
+        template.junctions = JunctionGraph(CompactGrid.from_template(template))
+        template.wall_tiles = compute_wall_tiles(template)
+        return template
+
+    def get_grid(self, grid_name):
+        template = self._grid_templates.get(grid_name)
+        if template is None:
+            template = self._create_grid_template(grid_name)
+            self._grid_templates[grid_name] = template
+        if self._config['gameplay']['grid_backend'] == 'compact':
+            grid = CompactGrid.from_template(template)
+        else:
+            grid = Grid.from_template(template)
+        if self._config['gameplay']['ghost_targeting'] == 'path':
+            grid.distances = self._distance_tables.get(grid_name)
+            if grid.distances is None:
+                grid.distances = create_distance_table(
+                    grid.junctions,
+                    self._config['gameplay']['distance_table_max_bytes']
+                )
+                self._distance_tables[grid_name] = grid.distances
         return grid
 
-    # todo max_ratings_count check and max_name_length
+    def _get_bundle_sources(self):
+        return collect_sources(self._resource_path, self._bundle_sources)
+
+    def _get_bundle_settings(self):
+        return {
+            'px_per_unit': self._config['view']['px_per_unit'],
+            'ghost_colors': sorted(
+                tuple(color) for color in self._config['view']['ghost_colors'].values()
+            )
+        }
+
+    def _load_bundle(self):
+        self._bundle = None
+        if not paths.exists(self._bundle_path):
+            return
+        bundle = ResourceBundle.read(self._bundle_path)
+        if not bundle.is_valid(self._get_bundle_sources(), self._get_bundle_settings()):
+            logging.info('Resource bundle is outdated, loading sources')
+            return
+        self._bundle = bundle
+
+    def bake(self):
+        if not Image:
+            raise ResourceLoadingError(True, message='Image library is not found')
+        settings = self._get_bundle_settings()
+        bundle = ResourceBundle(self._get_bundle_sources(), settings)
+        with Stopwatch() as stopwatch:
+            for file_name in listdir(self._grid_path):
+                bundle.grids[file_name] = self._read_grid(file_name)
+            for file_name in listdir(self._texture_path):
+                if not file_name.endswith('.png'):
+                    continue
+                name = paths.splitext(file_name)[0]
+                sprite = self._decode_texture(paths.join(self._texture_path, file_name))
+                bundle.textures[name] = self._pack_images(sprite._images)
+                if name == self._ghost_texture:
+                    for color in settings['ghost_colors']:
+                        bundle.tints[name, color] = self._pack_images(
+                            [self._tint_image(texture, color) for texture in sprite._images]
+                        )
+            for file_name in listdir(self._animation_path):
+                if not file_name.endswith('.json'):
+                    continue
+                name = paths.splitext(file_name)[0]
+                bundle.animations[name] = self._read_animation(
+                    paths.join(self._animation_path, file_name)
+                )
+            for file_name in listdir(self._sound_path):
+                if not file_name.endswith('.wav'):
+                    continue
+                name = paths.splitext(file_name)[0]
+                bundle.sounds[name] = self._read_wave(paths.join(self._sound_path, file_name))
+            bundle.write(self._bundle_path)
+        logging.info(
+            f'Resource bundle {self._bundle_path} baked in {stopwatch.result_ms:.1f} ms '
+            f'({stat(self._bundle_path).st_size} bytes)'
+        )
+
     def _load_ratings(self):
-        data = None
+        makedirs(self._data_path, exist_ok=True)
+        self._leaderboard = Leaderboard(
+            self._leaderboard_path, self._config['common']['rating_retention']
+        )
+        if self._leaderboard.is_empty() and paths.exists(self._ratings_path):
+            self._import_legacy_ratings()
+
+    def _import_legacy_ratings(self):
         try:
-            with open(self._ratings_path, 'r') as ratings_file:
-                data = ratings_file.read()
-        except:
+            with open(self._ratings_path, 'r', encoding='utf-8') as ratings_file:
+                ratings_json = json.load(ratings_file)
+            records = [
+                (record['name'], int(record['rating']), '', '', 0)
+                for record in ratings_json
+            ]
+        except (OSError, ValueError, TypeError, KeyError):
             raise ResourceLoadingError(False, message='Can\'t read ratings file')
-        ratings_json = json.loads(data)
-        for record in ratings_json:
-            try:
-                self._ratings.append((record['name'], record['rating']))
-            except ValueError:
-                raise ResourceLoadingError(False, message='Can\'t read ratings file')
-        self._ratings.sort(key=lambda x: -x[1])
-        self._ratings = self._ratings[:self._max_rating_count]
-        # todo exc
-        # todo если ресурс критический - корректно завершаем прогу,
-        # todo инача пользуемся значениями по-умолчанию, прописанными в init
-
-    def get_rating_list(self):
-        return self._ratings
-
-    def add_rating(self, name, rating):
-        parser = configparser.ConfigParser()
-        self._ratings.append((name, rating))
-        self._ratings.sort(key=lambda x: -x[1])
-        self._ratings = self._ratings[:10]
-        for rating in self._ratings:
-            parser.set('DEFAULT', str(rating[0]), str(rating[1]))
+        self._leaderboard.add_many(records)
+
+    def get_rating_list(self, grid=None, difficulty=None, page=0):
+        if not self._leaderboard:
+            return []
+        return self._leaderboard.top(
+            grid, difficulty, self._max_rating_count, page * self._max_rating_count
+        )
+
+    def add_rating(self, name, rating, grid='', difficulty='', level=0, callback=None):
+        if self._leaderboard:
+            self._io_worker.run(
+                partial(self._leaderboard.add, name, rating, grid, difficulty, level),
+                callback
+            )
+
+    def _get_save_path(self, save_index):
+        return paths.join(self._saves_path, f'save_{save_index}.pms')
+
+    @staticmethod
+    def _get_save_stamp(path):
+        save_stat = stat(path)
+        return [save_stat.st_size, save_stat.st_mtime_ns]
+
+    def _load_saves(self):
         try:
-            with open(self._ratings_path, 'w', encoding='utf-8') as fd:
-                parser.write(fd)
-        except OSError as exc:
-            logging.error(exc)
+            with open(self._save_index_path, 'r', encoding='utf-8') as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            index = {}
+        self._save_index = {}
+        for save_index in self._save_slots:
+            key = str(save_index)
+            path = self._get_save_path(save_index)
+            legacy_path = paths.join(self._saves_path, 'save_' + str(save_index))
+            try:
+                if paths.exists(path):
+                    stamp = self._get_save_stamp(path)
+                    entry = index.get(key)
+                    if not isinstance(entry, dict) or entry.get('stamp') != stamp:
+                        entry = {
+                            'stamp': stamp,
+                            'info': SaveGame.read_info(path).to_dict()
+                        }
+                    self._save_index[key] = entry
+                    self._save_infos[save_index] = SaveInfo.from_dict(entry['info'])
+                elif paths.exists(legacy_path):
+                    save = SaveGame.read_legacy(legacy_path)
+                    self._saves[save_index] = save
+                    self._save_infos[save_index] = save.info
+            except (ResourceLoadingError, KeyError, TypeError) as exc:
+                logging.error(exc)
+        self._save_list = None
+        if self._save_index != index:
+            self._write_save_index()
 
-    def _load_saves(self):  # todo validate save and maybe others
-        for save_index in chain(range(self._max_save_count), ('quick',)):
-            path = paths.join(self._saves_path, 'save_' + str(save_index))
-            if not paths.exists(path):
-                continue
-            parser = configparser.ConfigParser()
-            read_ok = parser.read(path, encoding='utf-8')
-            if not read_ok:
-                raise ResourceLoadingError(False, 'Can\'t read save file')
-            for section in parser:
-                if section == 'DEFAULT':
-                    continue
-                for key in parser[section]:
-                    for method in (parser.getint, parser.getfloat,
-                                   parser.getboolean):
-                        try:
-                            value = method(section, key)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        value = parser.get(section, key)
-                    self._saves[save_index][section][key] = value
+    def _write_save_index(self):
+        data = json.dumps(self._save_index).encode('utf-8')
+        self._io_worker.write(self._save_index_path, data)
 
     def list_saves(self):
-        return [
-            (index, self._saves[index])
-            for index in chain(range(self._max_save_count), ('quick',))
-        ]
+        if self._save_list is None:
+            self._save_list = [
+                (index, self._save_infos.get(index))
+                for index in self._save_slots
+            ]
+        return self._save_list
 
     def get_save(self, index):
-        return self._saves[index]
-
-    def add_save(self, index, save):
-        parser = configparser.ConfigParser()
-        parser.read_dict(save)
-        path = paths.join(self._saves_path, 'save_' + str(index))
-        try:
-            with open(path, 'w', encoding='utf-8') as fd:
-                parser.write(fd)
-        except OSError as exc:
-            logging.error(exc)
-        self._load_saves()
+        if index not in self._saves and index in self._save_infos:
+            try:
+                self._saves[index] = SaveGame.read(self._get_save_path(index))
+            except ResourceLoadingError as exc:
+                logging.error(exc)
+                return None
+        return self._saves.get(index)
+
+    def add_save(self, index, save, callback=None):
+        path = self._get_save_path(index)
+        info = save.info
+        self._saves[index] = save
+        self._save_infos[index] = info
+        self._save_list = None
+
+        def on_written(error):
+            if not error:
+                self._save_index[str(index)] = {
+                    'stamp': self._get_save_stamp(path),
+                    'info': info.to_dict()
+                }
+                self._write_save_index()
+            if callback:
+                callback(error)
+
+        self._io_worker.write(path, save.to_bytes(), on_written)
+
+    def is_save_pending(self, index):
+        return self._io_worker.is_pending(self._get_save_path(index))
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+        if self._tint_cache_dirty:
+            self._write_tint_cache()
+        self._io_worker.close()
+        if self._leaderboard:
+            self._leaderboard.close()
+
+    def get_new_replay_path(self):
+        makedirs(self._replays_path, exist_ok=True)
+        name = datetime.datetime.now().strftime('replay_%Y%m%d_%H%M%S_%f.pmr')
+        return paths.join(self._replays_path, name)
 
     @staticmethod
     def get_icon_path():
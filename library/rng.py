@@ -0,0 +1,51 @@
+import hashlib
+import random
+
+
+class RandomSource:
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        self._random = random.Random(seed)
+        self.revision = 0
+        self._stored_revision = None
+        self._stored_state = None
+
+    def randint(self, a, b):
+        self.revision += 1
+        return self._random.randint(a, b)
+
+    def random(self):
+        self.revision += 1
+        return self._random.random()
+
+    def choice(self, sequence):
+        self.revision += 1
+        return self._random.choice(sequence)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+        self._random.seed(self.seed)
+        self.revision += 1
+
+    def snapshot(self):
+        if self._stored_revision != self.revision:
+            self._stored_state = self._random.getstate()
+            self._stored_revision = self.revision
+        return self._stored_state
+
+    def restore(self, state):
+        self._random.setstate(state)
+        self.revision += 1
+        self._stored_state = state
+        self._stored_revision = self.revision
+
+    def spawn(self, count):
+        return [RandomSource(self.child_seed(index)) for index in range(count)]
+
+    def child_seed(self, index):
+        digest = hashlib.sha256(f'{self.seed}/{index}'.encode()).digest()
+        return int.from_bytes(digest[:8], 'big')
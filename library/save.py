@@ -0,0 +1,308 @@
+import base64
+import configparser
+import struct
+from array import array
+
+from library.events import EventId
+from library.exceptions import ResourceLoadingError
+from library.geometry import Direction, Vector2
+from library.model.actor import Pacman, Enemy
+from library.model.field import Block
+from library.model.movement import UNITS_PER_CELL
+from library.model.rewind import GameSnapshot
+
+
+def _pack_direction(direction):
+    return -1 if direction is None else direction.value
+
+
+def _unpack_direction(value):
+    return None if value < 0 else Direction(value)
+
+
+def _pack_cell(cell):
+    return (-1, -1) if cell is None else (int(cell.x), int(cell.y))
+
+
+def _unpack_cell(x, y):
+    return None if x < 0 else Vector2(x, y)
+
+
+class SaveInfo:
+
+    __slots__ = ('date', 'grid', 'difficulty', 'level', 'scores')
+
+    def __init__(self, date, grid, difficulty, level, scores):
+        self.date = date
+        self.grid = grid
+        self.difficulty = difficulty
+        self.level = level
+        self.scores = scores
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data[key] for key in cls.__slots__))
+
+
+class SaveGame:
+
+    magic = b'PMSV'
+    version = 2
+
+    # magic, version, seed flag, seed, time, level, scores, lives, dots
+    _header = struct.Struct('<4sHBQIHIHH')
+    _string_length = struct.Struct('<B')
+    # grid name, difficulty and date strings follow the header
+    _info_max_size = _header.size + 3 * (_string_length.size + 255)
+    _content_length = struct.Struct('<I')
+    # version, gauss flag, gauss next, word count
+    _random = struct.Struct('<BBdH')
+    _scheduler_length = struct.Struct('<H')
+    # delay, event id
+    _planned_event = struct.Struct('<iH')
+    # x, y, direction, units x, units y, last units x, last units y,
+    # mode 1, mode 2, next direction, last turn x, last turn y
+    _pacman = struct.Struct('<ddhiiiiBBhhh')
+    # x, y, direction, units x, units y, last units x, last units y,
+    # mode 1, mode 2, mode 3, last turn x, last turn y, last node
+    _enemy = struct.Struct('<ddhiiiiBBBhhb')
+
+    actor_names = ('pacman', 'red_ghost', 'pink_ghost', 'blue_ghost', 'orange_ghost')
+
+    def __init__(self, date, grid, difficulty, seed, snapshot):
+        self.date = date
+        self.grid = grid
+        self.difficulty = difficulty
+        self.seed = seed
+        self.snapshot = snapshot
+
+    @property
+    def info(self):
+        return SaveInfo(
+            self.date, self.grid, self.difficulty,
+            self.snapshot.level, self.snapshot.scores
+        )
+
+    def to_bytes(self):
+        snapshot = self.snapshot
+        chunks = [
+            self._header.pack(
+                self.magic, self.version, self.seed is not None, self.seed or 0,
+                snapshot.time, snapshot.level, snapshot.scores, snapshot.lives,
+                snapshot.dots
+            )
+        ]
+        for string in (self.grid, self.difficulty, self.date):
+            string = string.encode()
+            chunks.append(self._string_length.pack(len(string)))
+            chunks.append(string)
+        chunks += [
+            self._content_length.pack(len(snapshot.content)),
+            snapshot.content
+        ]
+        version, words, gauss_next = snapshot.random
+        chunks.append(self._random.pack(
+            version, gauss_next is not None, gauss_next or 0, len(words)
+        ))
+        chunks.append(array('I', words).tobytes())
+        planned_events = [
+            (delay, event_id)
+            for delay, event_ids in snapshot.scheduler
+            for event_id in event_ids
+        ]
+        chunks.append(self._scheduler_length.pack(len(planned_events)))
+        for delay, event_id in planned_events:
+            chunks.append(self._planned_event.pack(delay, event_id.value))
+        pacman = snapshot.actors['pacman']
+        chunks.append(self._pacman.pack(
+            *pacman[:2], pacman[2].value, *pacman[3:7],
+            pacman[7].value, pacman[8].value,
+            _pack_direction(pacman[9]), *_pack_cell(pacman[10])
+        ))
+        for name in self.actor_names[1:]:
+            enemy = snapshot.actors[name]
+            chunks.append(self._enemy.pack(
+                *enemy[:2], enemy[2].value, *enemy[3:7],
+                enemy[7].value, enemy[8].value, enemy[9].value,
+                *_pack_cell(enemy[10]), -1 if enemy[11] is None else enemy[11]
+            ))
+        return b''.join(chunks)
+
+    @classmethod
+    def _unpack_header(cls, data):
+        magic, version, has_seed, seed, time, level, scores, lives, dots = \
+            cls._header.unpack_from(data)
+        if magic != cls.magic or version != cls.version:
+            raise ResourceLoadingError(False, message='Unsupported save format')
+        if not has_seed:
+            seed = None
+        position = cls._header.size
+        strings = []
+        for _ in range(3):
+            length, = cls._string_length.unpack_from(data, position)
+            position += cls._string_length.size
+            strings.append(data[position:position + length].decode())
+            position += length
+        return (seed, time, level, scores, lives, dots, *strings), position
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            header, position = cls._unpack_header(data)
+            seed, time, level, scores, lives, dots, grid, difficulty, date = header
+            length, = cls._content_length.unpack_from(data, position)
+            position += cls._content_length.size
+            content = data[position:position + length]
+            position += length
+            random_version, has_gauss, gauss_next, word_count = \
+                cls._random.unpack_from(data, position)
+            position += cls._random.size
+            words = array('I')
+            words.frombytes(data[position:position + word_count * words.itemsize])
+            position += word_count * words.itemsize
+            random_state = (
+                random_version, tuple(words), gauss_next if has_gauss else None
+            )
+            count, = cls._scheduler_length.unpack_from(data, position)
+            position += cls._scheduler_length.size
+            scheduler = []
+            for _ in range(count):
+                delay, event_id = cls._planned_event.unpack_from(data, position)
+                position += cls._planned_event.size
+                scheduler.append((delay, (EventId(event_id),)))
+            values = cls._pacman.unpack_from(data, position)
+            position += cls._pacman.size
+            actors = {
+                'pacman': (
+                    *values[:2], Direction(values[2]), *values[3:7],
+                    Pacman.Mode(values[7]), Pacman.Mode(values[8]),
+                    _unpack_direction(values[9]), _unpack_cell(*values[10:12])
+                )
+            }
+            for name in cls.actor_names[1:]:
+                values = cls._enemy.unpack_from(data, position)
+                position += cls._enemy.size
+                actors[name] = (
+                    *values[:2], Direction(values[2]), *values[3:7],
+                    Enemy.Mode(values[7]), Enemy.Mode(values[8]), Enemy.Mode(values[9]),
+                    _unpack_cell(*values[10:12]), None if values[12] < 0 else values[12]
+                )
+        except (struct.error, UnicodeDecodeError, ValueError):
+            raise ResourceLoadingError(False, message='Corrupted save file')
+        snapshot = GameSnapshot(
+            None, time, level, scores, lives, dots,
+            tuple(scheduler), random_state, content, actors
+        )
+        return cls(date, grid, difficulty, seed, snapshot)
+
+    @classmethod
+    def from_legacy(cls, save):
+        try:
+            blocks = {
+                tuple(map(int, cell.split(','))): Block.Content[content]
+                for cell, content in save['blocks'].items()
+            }
+            width = max(x for x, _ in blocks) + 1
+            content = bytearray(width * (max(y for _, y in blocks) + 1))
+            for (x, y), block_content in blocks.items():
+                content[y * width + x] = block_content.value
+            scheduler = tuple(
+                (
+                    int(delay),
+                    tuple(EventId[name[1:-1]] for name in event_ids[1:-1].split(', '))
+                )
+                for delay, event_ids in save['scheduler'].items()
+            )
+            random_state = None
+            if 'state' in save.get('random', {}):
+                version, gauss_next, words = save['random']['state'].split(':')
+                internal_state = array('I')
+                internal_state.frombytes(base64.b64decode(words))
+                random_state = (
+                    int(version),
+                    tuple(internal_state),
+                    None if gauss_next == 'None' else float(gauss_next)
+                )
+            actors = {}
+            for name in cls.actor_names:
+                record = save[name]
+                x, y = map(float, record['position'].split(','))
+                units_x = round(x * UNITS_PER_CELL)
+                units_y = round(y * UNITS_PER_CELL)
+                last_turn = None
+                if record['last_turn'] != 'None':
+                    last_turn = Vector2(*map(float, record['last_turn'].split(',')))
+                actor = (
+                    x, y, Direction[record['direction']],
+                    units_x, units_y, units_x, units_y
+                )
+                if name == 'pacman':
+                    actor += (
+                        Pacman.Mode[record['mode1']], Pacman.Mode[record['mode2']],
+                        None, last_turn
+                    )
+                else:
+                    actor += (
+                        Enemy.Mode[record['mode1']], Enemy.Mode[record['mode2']],
+                        Enemy.Mode[record['mode3']], last_turn,
+                        None if record['last_node'] == 'None' else int(record['last_node'])
+                    )
+                actors[name] = actor
+            game = save['game']
+            snapshot = GameSnapshot(
+                None, game['time'], game['level'], game['scores'], game['lives'],
+                game['dots'], scheduler, random_state, bytes(content), actors
+            )
+            return cls(save['info']['date'], game['grid'], game['difficulty'], None, snapshot)
+        except (KeyError, ValueError, TypeError):
+            raise ResourceLoadingError(False, message='Corrupted legacy save file')
+
+    def write(self, path):
+        with open(path, 'wb') as save_file:
+            save_file.write(self.to_bytes())
+
+    @classmethod
+    def read(cls, path):
+        try:
+            with open(path, 'rb') as save_file:
+                data = save_file.read()
+        except OSError:
+            raise ResourceLoadingError(False, message=f'Can\'t read save file {path}')
+        return cls.from_bytes(data)
+
+    @classmethod
+    def read_info(cls, path):
+        try:
+            with open(path, 'rb') as save_file:
+                data = save_file.read(cls._info_max_size)
+        except OSError:
+            raise ResourceLoadingError(False, message=f'Can\'t read save file {path}')
+        try:
+            header, _ = cls._unpack_header(data)
+        except (struct.error, UnicodeDecodeError):
+            raise ResourceLoadingError(False, message='Corrupted save file')
+        _, _, level, scores, _, _, grid, difficulty, date = header
+        return SaveInfo(date, grid, difficulty, level, scores)
+
+    @classmethod
+    def read_legacy(cls, path):
+        parser = configparser.ConfigParser()
+        if not parser.read(path, encoding='utf-8'):
+            raise ResourceLoadingError(False, message=f'Can\'t read save file {path}')
+        save = {}
+        for section in parser.sections():
+            save[section] = {}
+            for key in parser[section]:
+                for method in (parser.getint, parser.getfloat, parser.getboolean):
+                    try:
+                        value = method(section, key)
+                        break
+                    except ValueError:
+                        continue
+                else:
+                    value = parser.get(section, key)
+                save[section][key] = value
+        return cls.from_legacy(save)
@@ -63,24 +63,22 @@ class Scheduler:
 
     def _on_tick(self, event_args):
         self.current_time = event_args.time
-        while self._planned_events[self.current_time]:
-            event_id = self._planned_events[self.current_time].popleft()
+        planned_events = self._planned_events.get(self.current_time)
+        while planned_events:
+            event_id = planned_events.popleft()
             self._event_dispatcher.fire(event_id, self)
+        self._planned_events.pop(self.current_time, None)
 
     def reset(self):
         self._planned_events = defaultdict(deque)
 
-    def store(self):
-        result = defaultdict(list)
-        for time_ in self._planned_events.keys():
-            for planned_event in self._planned_events[time_]:
-                result[time_ - self.current_time].append(planned_event.name)
-        return result
-
-    def load(self, data):
-        for time_ in data:
-            for planned_event in data[time_][1:-1].split(', '):
-                time_ = int(time_) + self.current_time
-                self._planned_events[time_].append(
-                    EventId[planned_event[1:-1]]
-                )
+    def snapshot(self):
+        return tuple(
+            (time_ - self.current_time, tuple(planned_events))
+            for time_, planned_events in self._planned_events.items()
+        )
+
+    def restore(self, snapshot):
+        self._planned_events = defaultdict(deque)
+        for delay, planned_events in snapshot:
+            self._planned_events[self.current_time + delay].extend(planned_events)
@@ -1,7 +1,10 @@
+from library.cache import CacheRegistry
 from library.events import EventId, EventDispatcher
+from library.geometry import Vector2
 from library.interface import AbstractGraphics
 from library.model.actor import Enemy
 from library.model.game_driver import GameDriver
+from library.view.game_view import TextDrawer
 
 
 class EnemyDrawer:
@@ -34,6 +37,48 @@ class EnemyDrawer:
         self._canvas.clear(self._canvas_id)
 
 
+class CacheStatsDrawer:
+
+    _update_interval = 60
+
+    def __init__(self, services, canvas):
+        self._services = services
+        self._canvas = canvas
+        self._caches = self._services[CacheRegistry]
+        self._text_drawers = []
+        self._lines = []
+        self._frame = 0
+
+    def draw(self, position):
+        # stats text is refreshed periodically, missing items are redrawn at once
+        refresh = self._frame % self._update_interval == 0
+        self._frame += 1
+        if refresh:
+            self._lines = self._stat_lines()
+        elif all(text_drawer.is_drawn for text_drawer in self._text_drawers[:len(self._lines)]):
+            return
+        lines = self._lines
+        while len(self._text_drawers) < len(lines):
+            self._text_drawers.append(TextDrawer(self._services, self._canvas))
+        for i, text_drawer in enumerate(self._text_drawers):
+            if i < len(lines):
+                text_drawer.draw(position.move(0, i), lines[i], TextDrawer.Align.LEFT)
+            else:
+                text_drawer.clear()
+
+    def _stat_lines(self):
+        lines = []
+        for stats in self._caches.stats():
+            lines.append(f'{stats.name}: {stats.hit_rate:.0%}')
+            lines.append(f' {stats.entries} {stats.size // 1024}k')
+        return lines
+
+    def clear(self):
+        self._frame = 0
+        for text_drawer in self._text_drawers:
+            text_drawer.clear()
+
+
 class DebugView:
 
     def __init__(self, services, canvas):
@@ -63,6 +108,7 @@ class DebugView:
                 '#f90'
             )
         }
+        self._cache_stats_drawer = CacheStatsDrawer(self._services, self._canvas)
         self._event_dispatcher.subscribe(EventId.MODEL_UPDATE, self._on_model_update)
         self._event_dispatcher.subscribe(EventId.REDRAW, self._on_redraw)
 
@@ -76,3 +122,6 @@ class DebugView:
             for actor in self._model.field.actors.values():
                 if actor.name in self._actor_drawers:
                     self._actor_drawers[actor.name].draw(actor)
+            self._cache_stats_drawer.draw(Vector2(self._model.field.grid.size.x + 1, 8))
+        else:
+            self._cache_stats_drawer.clear()
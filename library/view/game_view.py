@@ -2,8 +2,8 @@ from collections import deque
 
 from library.config import AbstractConfig
 from library.events import EventId, EventDispatcher
-from library.geometry import Vector2, Direction
-from library.graphics import SpriteDrawer
+from library.geometry import Vector2
+from library.drawers import SpriteDrawer
 from library.interface import AbstractGraphics
 from library.model.actor import Pacman, Enemy, Actor
 from library.model.field import Block
@@ -23,28 +23,30 @@ class TextDrawer:
 
     def __init__(self, services, canvas):
         self._services = services
-        self._sprite = self._services[ResourceManager].get_sprite('symbols')
-        self._canvas = canvas
-        self._drawers = []
+        self._resources = self._services[ResourceManager]
+        self._drawer = SpriteDrawer(self._services[AbstractGraphics], canvas)
+        self._text = None
+        self._sprite = None
+
+    @property
+    def is_drawn(self):
+        return self._drawer.is_drawn
 
     def draw(self, position, text, align=Align.CENTER):
         if align == self.Align.RIGHT:
             position = position.move(-len(text), 0)
         elif align == self.Align.CENTER:
             position = position.move(-len(text) / 2, 0)
-        self.clear()
-        for i, char in enumerate(text):
-            if char == ' ':
-                continue
-            drawer = SpriteDrawer(self._services[AbstractGraphics], self._canvas)  # todo: why we are creating it each frame?
-            self._drawers.append(drawer)
-            idx = self._services[ResourceManager].get_symbol_map()[ord(char)]
-            drawer.draw(position.move(i, 0) + self._offset, self._sprite, idx)
+        if not text.strip():
+            self.clear()
+            return
+        if text != self._text:
+            self._sprite = self._resources.get_text_sprite(text)
+            self._text = text
+        self._drawer.draw(position + self._offset, self._sprite, 0)
 
     def clear(self):
-        while self._drawers:
-            drawer = self._drawers.pop()
-            drawer.clear()
+        self._drawer.clear()
 
 
 class ActorDrawer:
@@ -134,75 +136,32 @@ class BlockDrawer:
     def __init__(self, services, canvas):
         self._resources = services[ResourceManager]
         self._drawer = SpriteDrawer(services[AbstractGraphics], canvas)
-        self._last_state = None
 
-    def draw(self, block, field):
-        # if not self._last_state:  # todo
-        #     self._last_state = 1
-        # elif self._last_state == block.content:
-        #     return
-        # else:
-        #     self._last_state = block.content
+    @staticmethod
+    def get_sprite_name(content, cell, grid):
         sprite_name = ''
-        match block.content:
+        match content:
             case Block.Content.FRUIT:
                 sprite_name += 'fruit_0'
             case Block.Content.WALL:
-                sprite_name += f'wall_{self.wall_type(block, field)}'
+                sprite_name += f'wall_{grid.wall_tiles[cell.y * grid.size.x + cell.x]}'
             case _:
-                sprite_name += block.content.name.lower()
+                sprite_name += content.name.lower()
+        return sprite_name
+
+    def draw(self, block, field):
+        sprite_name = self.get_sprite_name(block.content, block.cell, field.grid)
         sprite_data = self._resources.get_sprite_library()[sprite_name]
         sprite = self._resources.get_sprite(sprite_data['file'])
         idx = sprite_data['default_idx']
         self._drawer.draw(block.cell + self._offset, sprite, idx)
 
-    @staticmethod
-    def wall_type(block, field):
-        e_point = field.grid.anchors['enemies']
-        if e_point.x < block.cell.x < e_point.x + 7:
-            if block.cell.y == e_point.y:
-                return 2
-            if block.cell.y == e_point.y + 4:
-                return 8
-        if e_point.y < block.cell.y < e_point.y + 4:
-            if block.cell.x == e_point.x:
-                return 4
-            if block.cell.x == e_point.x + 7:
-                return 6
-        if list(block.connections.values()).count(True) == 0:
-            up = field.grid[block.cell.move(0, -1)]
-            down = field.grid[block.cell.move(0, 1)]
-            if up.connections[Direction.WEST]:
-                return 13
-            elif up.connections[Direction.EAST]:
-                return 12
-            elif down.connections[Direction.WEST]:
-                return 11
-            elif down.connections[Direction.EAST]:
-                return 10
-            else:
-                return 5
-        else:
-            conf = {
-                0: 6, 90: 2, 180: 4, 270: 8, 360: 3, 810: 1, 1080: 9, 1260: 7
-            }
-            sum_ = sum(
-                map(
-                    lambda x: (x[0] * 3 + 1) * x[1],
-                    enumerate(
-                        sorted(
-                            map(
-                                lambda x: x.value,
-                                filter(
-                                    lambda x: block.connections[x],
-                                    block.connections
-                                )
-                            )
-                        )
-                    )
-                )
-            )
-            return conf[sum_]
+    @property
+    def is_drawn(self):
+        return self._drawer.is_drawn
+
+    def hide(self):
+        self._drawer.hide()
 
     def clear(self):
         self._drawer.clear()
@@ -225,7 +184,8 @@ class BackgroundDrawer:
             self._drawers[i, j] = SpriteDrawer(self._graphics, self._canvas)
         return self._drawers[i, j]
 
-    def draw(self, position, size):
+    @staticmethod
+    def get_tiles(size):
         for j in range(size.y):
             for i in range(size.x):
                 sprite_name = ''
@@ -250,8 +210,12 @@ class BackgroundDrawer:
                         sprite_name += 'wall_4'
                     else:
                         sprite_name += 'empty'
-                sprite_idx = self._resources.get_sprite_library()[sprite_name]['default_idx']
-                self._get_drawer(i, j).draw(position.move(i, j) + self._offset, self._sprite, sprite_idx)
+                yield i, j, sprite_name
+
+    def draw(self, position, size):
+        for i, j, sprite_name in self.get_tiles(size):
+            sprite_idx = self._resources.get_sprite_library()[sprite_name]['default_idx']
+            self._get_drawer(i, j).draw(position.move(i, j) + self._offset, self._sprite, sprite_idx)
 
 
 class MenuDrawer:
@@ -273,15 +237,14 @@ class MenuDrawer:
         self._background_drawer.draw(Vector2.zero(), world_size)
 
     def _draw_content(self, model, content):
-        while self._content_drawers:
-            drawer = self._content_drawers.pop()
+        while len(self._content_drawers) < len(content):
+            self._content_drawers.append(TextDrawer(self._services, self._canvas))
+        for drawer in self._content_drawers[len(content):]:
             drawer.clear()
         for i, line in enumerate(content):
             x = model.get_size().x / 2
             y = (model.get_size().y - len(content)) / 2 + i
-            drawer = TextDrawer(self._services, self._canvas)
-            self._content_drawers.append(drawer)
-            drawer.draw(Vector2(x, y), line)
+            self._content_drawers[i].draw(Vector2(x, y), line)
 
     def _draw_page(self, model, menu, prev_content):
         for i, (caption, _, _, _) in enumerate(menu.current_page.items):
@@ -292,9 +255,9 @@ class MenuDrawer:
         self._draw_content(model, prev_content)
 
     def _draw_ratings(self, model, menu, prev_content):
-        for i, (name, rating) in enumerate(menu.current_page.ratings):
+        for i, (name, rating) in enumerate(menu.current_page.ratings, menu.current_page.offset + 1):
             space = '.' * (16 - (len(name) + len(str(rating))))
-            prev_content.append(str(i + 1) + '.' + name + space + str(rating))
+            prev_content.append(str(i) + '.' + name + space + str(rating))
         prev_content.append('')
         self._draw_page(model, menu, prev_content)
 
@@ -318,9 +281,9 @@ class MenuDrawer:
         x = model.get_size().x / 2
         y = model.get_size().y / 4
         self._title_drawer.draw(Vector2(x, y), model.menu.current_page.title)
-        if model.menu.current_page is RatingsItem:
+        if isinstance(model.menu.current_page, RatingsItem):
             self._draw_ratings(model, model.menu, [])
-        elif model.menu.current_page is RecordItem:
+        elif isinstance(model.menu.current_page, RecordItem):
             self._draw_record(model, model.menu, [])
         else:
             self._draw_page(model, model.menu, [])
@@ -331,6 +294,9 @@ class MenuDrawer:
 
 class GameDrawer:
 
+    _static_contents = (Block.Content.WALL, Block.Content.DOOR)
+    _dynamic_contents = (Block.Content.DOT, Block.Content.ENERGIZER, Block.Content.FRUIT)
+
     def __init__(self, services, canvas):
         self._services = services
         self._config = self._services[AbstractConfig]
@@ -338,7 +304,10 @@ class GameDrawer:
         self._resources = self._services[ResourceManager]
         self._canvas = canvas
         self._actor_drawers = {}
-        self._block_drawers = {}
+        self._block_drawers = []
+        self._grid = None
+        self._content = None
+        self._revision = None
         self._text_drawer = TextDrawer(self._services, self._canvas)
         self._actor_drawers['pacman'] = PacmanDrawer(
             self._graphics,
@@ -350,53 +319,106 @@ class GameDrawer:
             self._canvas,
             self._resources,
             'red_ghost',
-            (1, 0, 0, 1)
+            tuple(self._config['view']['ghost_colors']['red_ghost'])
         )
         self._actor_drawers['pink_ghost'] = EnemyDrawer(
             self._graphics,
             self._canvas,
             self._resources,
             'pink_ghost',
-            (1, 0.6, 0.6, 1)
+            tuple(self._config['view']['ghost_colors']['pink_ghost'])
         )
         self._actor_drawers['blue_ghost'] = EnemyDrawer(
             self._graphics,
             self._canvas,
             self._resources,
             'blue_ghost',
-            (0, 0.74, 1, 1)
+            tuple(self._config['view']['ghost_colors']['blue_ghost'])
         )
         self._actor_drawers['orange_ghost'] = EnemyDrawer(
             self._graphics,
             self._canvas,
             self._resources,
             'orange_ghost',
-            (1, 0.54, 0, 1)
+            tuple(self._config['view']['ghost_colors']['orange_ghost'])
         )
         self._level_drawers = TextDrawer(services, self._canvas)
         self._scores_drawers = TextDrawer(services, self._canvas)
         self._lives_drawers = TextDrawer(services, self._canvas)
-        self._background_drawer = None
+        self._static_drawer = SpriteDrawer(self._graphics, self._canvas)
 
     def initial_draw(self, model):
         self._canvas.set_size(model.get_size() * self._config['view']['px_per_unit'] * self._config['view']['scale'])
-        for x in range(model.field.grid.size.x):
-            for y in range(model.field.grid.size.y):
-                self._block_drawers[Vector2(x, y)] = BlockDrawer(
-                    self._services,
-                    self._canvas
-                )
-        self._background_drawer = BackgroundDrawer(self._services, self._canvas)
-        self._background_drawer.draw(model.field.grid.size.with_(y=0), model.get_size())
+        self._grid = None
+
+    def _draw_static_layer(self, model):
+        # walls, doors and the side panel frame never change during a level,
+        # they are composited into one image under the dynamic block items
+        grid = model.field.grid
+        sprite_library = self._resources.get_sprite_library()
+        tiles = []
+
+        def add_tile(sprite_name, position):
+            sprite_data = sprite_library[sprite_name]
+            tiles.append((
+                sprite_data['file'],
+                sprite_data['default_idx'],
+                self._graphics.world_space_to_screen_space(position)
+            ))
+
+        for block in grid:
+            content = block.content
+            if content not in self._static_contents:
+                content = Block.Content.EMPTY
+            add_tile(
+                BlockDrawer.get_sprite_name(content, block.cell, grid),
+                block.cell + BlockDrawer._offset
+            )
+        panel = grid.size.with_(y=0)
+        for i, j, sprite_name in BackgroundDrawer.get_tiles(model.get_size()):
+            add_tile(sprite_name, panel.move(i, j) + BackgroundDrawer._offset)
+        layer = self._resources.render_layer(
+            self._graphics.world_space_to_screen_space(model.get_size()),
+            tiles
+        )
+        self._static_drawer.draw(Vector2.zero(), layer, 0)
+
+    def _draw_blocks(self, model):
+        grid = model.field.grid
+        if grid is not self._grid:
+            self._grid = grid
+            self._content = None
+            self._draw_static_layer(model)
+            # block items are kept between levels, new ones would stack above the actors
+            if len(self._block_drawers) != grid.size.x * grid.size.y:
+                for drawer in self._block_drawers:
+                    drawer.clear()
+                self._block_drawers = [
+                    BlockDrawer(self._services, self._canvas)
+                    for _ in range(grid.size.x * grid.size.y)
+                ]
+        elif grid.revision == self._revision:
+            return
+        content = grid.store_content()
+        for idx, value in enumerate(content):
+            if self._content is None or self._content[idx] != value:
+                block = grid[Vector2(idx % grid.size.x, idx // grid.size.x)]
+                drawer = self._block_drawers[idx]
+                if block.content in self._dynamic_contents:
+                    drawer.draw(block, model.field)
+                    continue
+                # cells that may get content back, after a rewind or for a fruit,
+                # hold a hidden item under the actors from the first frame on
+                if block.content not in self._static_contents and not drawer.is_drawn:
+                    drawer.draw(block, model.field)
+                drawer.hide()
+        self._content = content
+        self._revision = grid.revision
 
     def draw(self, model):
         if not model:
             return
-        for block in model.field.grid:
-            try:
-                self._block_drawers[block.cell].draw(block, model.field)
-            except KeyError:
-                pass
+        self._draw_blocks(model)
         for actor in model.field.actors.values():
             self._actor_drawers[actor.name].draw(actor)
         self._level_drawers.draw(
@@ -449,12 +471,20 @@ class View:
         self._drawers = {
             GameDriver.Mode.PLAY: GameDrawer(self._services, self._canvas),
             GameDriver.Mode.FREE: GameDrawer(self._services, self._canvas),
+            GameDriver.Mode.REWIND: GameDrawer(self._services, self._canvas),
             GameDriver.Mode.MENU: MenuDrawer(self._services, self._canvas),
             GameDriver.Mode.WIN: CaptionDrawer(self._services, self._canvas),
             GameDriver.Mode.LOSE: CaptionDrawer(self._services, self._canvas)
         }
         self._services[EventDispatcher].subscribe(EventId.MODEL_UPDATE, self._on_model_update)
         self._services[EventDispatcher].subscribe(EventId.REDRAW, self._on_redraw)
+        self._services[EventDispatcher].subscribe(EventId.GAME_INIT, self._on_game_init)
+
+    def _on_game_init(self, event_args):
+        resources = self._services[ResourceManager]
+        resources.preload(
+            {sprite['file'] for sprite in resources.get_sprite_library().values()}
+        )
 
     def _on_model_update(self, event_args):
         self._model = event_args.model
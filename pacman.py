@@ -4,14 +4,20 @@ import sys
 from argparse import ArgumentParser
 
 from engine.typemap import TypeMap
+from library.cache import CacheRegistry
 from library.config import AbstractConfig, ConfigJson
 from library.view.debug_view import DebugView
 from library.view.sound_engine import SoundEngine
-from library.controller import InputSourceTkinter, AbstractInputSource
+from library.exceptions import ResourceLoadingError
+from library.controller import InputSourceTkinter, InputSourceNull, AbstractInputSource
 from library.events import EventDispatcher
-from library.interface import Interface, GraphicsTkinter, AbstractGraphics
+from library.interface import (
+    Interface, HeadlessInterface, GraphicsTkinter, GraphicsFramebuffer, GraphicsNull, AbstractGraphics
+)
 from library.model.game_driver import GameDriver
 from library.resource_manager import ResourceManager
+from library.replay import Replay, ReplayPlayer, ReplayRecorder
+from library.rng import RandomSource
 from library.view.game_view import View
 
 
@@ -29,10 +35,47 @@ def config_logging(config):
 
 def parse_args():
     parser = ArgumentParser()
+    parser.add_argument('command', nargs='?', choices=['bake'])
     parser.add_argument('-d', '--debug', action='store_true')
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--grid', default='classic')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--record', action='store_true')
+    parser.add_argument('--replay')
+    parser.add_argument(
+        '--difficulty',
+        default=GameDriver.Difficulty.NORMAL.name.lower(),
+        choices=[difficulty.name.lower() for difficulty in GameDriver.Difficulty]
+    )
     return parser.parse_args()
 
 
+def run_headless(services, grid, difficulty, max_ticks=None, replay=None):
+    resources = services[ResourceManager]
+    if not resources.load(headless=True):
+        logging.info('App terminated')
+        return None
+    if grid not in resources.list_grids():
+        logging.error(f'Unknown grid {grid}')
+        return None
+    services[AbstractGraphics] = GraphicsNull(services)
+    interface = HeadlessInterface(services, None if replay else max_ticks)
+    if replay is not None:
+        # the game driver reads debug options on creation
+        replay.apply_rules(services[AbstractConfig])
+    game_driver = GameDriver(services)
+    services[AbstractInputSource] = InputSourceNull(services)
+    if replay is not None:
+        ReplayPlayer(services, game_driver, replay)
+    else:
+        game_driver.new_game(difficulty, grid)
+    ticks_per_second = interface.run()
+    resources.close()
+    services[CacheRegistry].log_stats()
+    return ticks_per_second
+
+
 def main():
     services = TypeMap()
     config = ConfigJson()
@@ -47,9 +90,39 @@ def main():
     if config['debug']['is_debug']:
         logging.info('Debug mode enabled')
     services[EventDispatcher] = EventDispatcher()
+    random_source = RandomSource(args.seed)
+    services[RandomSource] = random_source
+    logging.info(f'Random seed: {random_source.seed}')
+    services[CacheRegistry] = CacheRegistry(services)
     resources = ResourceManager(services)
     services[ResourceManager] = resources
-    services[AbstractGraphics] = GraphicsTkinter(services)
+    if args.command == 'bake':
+        try:
+            resources.bake()
+        except ResourceLoadingError as exc:
+            logging.error(exc)
+            logging.info('App terminated')
+        resources.close()
+        return
+    if args.record:
+        ReplayRecorder(services, resources.get_new_replay_path)
+    if args.replay:
+        try:
+            replay = Replay.read(args.replay)
+        except ResourceLoadingError as exc:
+            logging.error(exc.message)
+            logging.info('App terminated')
+            return
+        run_headless(services, replay.grid, None, replay=replay)
+        return
+    if args.headless:
+        difficulty = GameDriver.Difficulty[args.difficulty.upper()]
+        run_headless(services, args.grid, difficulty, args.ticks)
+        return
+    if config['view']['graphics_backend'] == 'framebuffer':
+        services[AbstractGraphics] = GraphicsFramebuffer(services)
+    else:
+        services[AbstractGraphics] = GraphicsTkinter(services)
     interface = Interface(services)
     services[Interface] = interface
     if not resources.load():
@@ -59,12 +132,15 @@ def main():
     View(services, interface.get_canvas())
     if config['debug']['is_debug']:
         DebugView(services, interface.get_canvas())
+    resources.preload()
     if config['view']['sound_enabled']:
         sound_engine = SoundEngine(services)
         sound_engine.initiate()
         sound_engine.run()
     services[AbstractInputSource] = InputSourceTkinter(services)
     interface.run()
+    resources.close()
+    services[CacheRegistry].log_stats()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,51 @@
+import os
+import sys
+from os import path as paths
+
+import pytest
+
+ROOT = paths.dirname(paths.dirname(paths.abspath(__file__)))
+# resource and config paths are resolved against the working directory
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from engine.typemap import TypeMap
+from library.cache import CacheRegistry
+from library.config import AbstractConfig, ConfigJson
+from library.controller import AbstractInputSource, InputSourceNull
+from library.events import EventDispatcher
+from library.interface import AbstractGraphics, GraphicsNull
+from library.resource_manager import ResourceManager
+from library.rng import RandomSource
+
+
+@pytest.fixture
+def make_services(tmp_path, monkeypatch):
+    data_path = ResourceManager._data_path
+    for name, value in list(vars(ResourceManager).items()):
+        if isinstance(value, str) and value.startswith(data_path):
+            monkeypatch.setattr(ResourceManager, name, str(tmp_path) + value[len(data_path):])
+    created = []
+
+    def make_services(**options):
+        services = TypeMap()
+        config = ConfigJson()
+        assert config.read('config.json')
+        for option, value in options.items():
+            section, key = option.split('__')
+            config[section][key] = value
+        services[AbstractConfig] = config
+        services[EventDispatcher] = EventDispatcher()
+        services[RandomSource] = RandomSource(0)
+        services[CacheRegistry] = CacheRegistry(services)
+        resources = ResourceManager(services)
+        services[ResourceManager] = resources
+        created.append(resources)
+        assert resources.load(headless=True)
+        services[AbstractGraphics] = GraphicsNull(services)
+        services[AbstractInputSource] = InputSourceNull(services)
+        return services
+
+    yield make_services
+    for resources in created:
+        resources.close()
@@ -0,0 +1,83 @@
+import random
+
+import numpy as np
+import pytest
+
+from library.controller import AbstractInputSource
+from library.events import EventDispatcher, EventId
+from library.geometry import Direction
+from library.model.batch import BatchSimulator
+from library.model.control import InputUid
+from library.model.game_driver import GameDriver
+from library.resource_manager import ResourceManager
+
+_input_uids = {
+    Direction.EAST: InputUid.RIGHT,
+    Direction.NORTH: InputUid.UP,
+    Direction.WEST: InputUid.LEFT,
+    Direction.SOUTH: InputUid.DOWN
+}
+
+
+def _assert_same_state(game_driver, simulator, game, tick):
+    for i, name in enumerate(simulator.actor_names):
+        actor = game_driver.field.actors[name]
+        x, y = simulator.positions[game, i]
+        assert (actor.position.x, actor.position.y) == (x, y), (game, tick, name)
+        assert simulator.directions[simulator.direction[game, i]] == actor.direction, (game, tick, name)
+        modes = simulator.pacman_mode[game] if i == 0 else simulator.enemy_mode[game, i - 1]
+        assert tuple(mode.value for mode in actor.mode) == tuple(modes), (game, tick, name)
+    assert game_driver.scores == simulator.scores[game], (game, tick)
+
+
+def _start_game(make_services, grid, difficulty, seed, god_mode):
+    services = make_services(debug__is_god_mode=god_mode)
+    event_dispatcher = services[EventDispatcher]
+    game_driver = GameDriver(services)
+    game_driver.new_game(difficulty, grid, seed)
+    time = 0
+    while game_driver.mode != GameDriver.Mode.PLAY:
+        event_dispatcher.fire(EventId.TICK, None, time=time)
+        time += 1
+    return services, game_driver, time
+
+
+@pytest.mark.parametrize('god_mode', (False, True))
+@pytest.mark.parametrize('difficulty', tuple(GameDriver.Difficulty))
+@pytest.mark.parametrize('grid', ('classic', 'custom'))
+@pytest.mark.parametrize('seeds', ((0, 1, 2), (3, 4, 5)))
+def test_batch_matches_field(make_services, seeds, grid, difficulty, god_mode, ticks=3000):
+    games = [
+        _start_game(make_services, grid, difficulty, seed, god_mode)
+        for seed in seeds
+    ]
+    # the batch starts counting at GAME_START, which the field has just handled
+    simulator = BatchSimulator(
+        games[0][0][ResourceManager].get_grid(grid), len(seeds), difficulty,
+        seeds=seeds, god_mode=god_mode
+    )
+    simulator.step()
+    controls_randoms = [random.Random(seed) for seed in seeds]
+    for tick in range(1, ticks):
+        if simulator.done.all():
+            break
+        controls = np.full(simulator.count, -1)
+        for game, (services, game_driver, time) in enumerate(games):
+            if simulator.done[game]:
+                continue
+            _assert_same_state(game_driver, simulator, game, tick)
+            controls_random = controls_randoms[game]
+            if controls_random.random() < 0.05:
+                controls[game] = controls_random.randrange(len(simulator.directions))
+                services[AbstractInputSource].press(
+                    _input_uids[simulator.directions[controls[game]]]
+                )
+            services[EventDispatcher].fire(EventId.TICK, None, time=time + tick - 1)
+        simulator.step(controls)
+
+
+def test_batch_rejects_distance_tables(make_services):
+    services = make_services(gameplay__ghost_targeting='path')
+    grid = services[ResourceManager].get_grid('classic')
+    with pytest.raises(ValueError):
+        BatchSimulator(grid, 1, GameDriver.Difficulty.NORMAL)
@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+from library.bundle import ResourceBundle
+from library.exceptions import ResourceLoadingError
+
+
+def _bundle():
+    return ResourceBundle(
+        {'textures/ghost.png': (1024, 1700000000000000000)},
+        {'px_per_unit': 16, 'ghost_colors': [(1, 0, 0, 1), (0, 0.74, 1, 1)]},
+        grids={'classic': ['#..#', '#00#']},
+        textures={'ghost': ('RGBA', (2, 1), [b'\x01' * 8, b'\x02' * 8])},
+        tints={('ghost', (1, 0, 0, 1)): ('RGBA', (2, 1), [b'\x03' * 8])},
+        animations={'pacman': '{"type": "Animation"}'},
+        sounds={'siren': (b'\x00\x7f' * 16, 1, 2, 22050)}
+    )
+
+
+def test_bundle_round_trip():
+    bundle = _bundle()
+    loaded = ResourceBundle.from_bytes(bundle.to_bytes())
+    assert loaded.is_valid(bundle.sources, bundle.settings)
+    for name in ('grids', 'textures', 'tints', 'animations', 'sounds'):
+        assert getattr(loaded, name) == getattr(bundle, name), name
+
+
+def test_bundle_rejects_other_payloads():
+    data = _bundle().to_bytes()
+    with pytest.raises(ResourceLoadingError):
+        ResourceBundle.from_bytes(data[:-1])
+    payload = pickle.dumps(({}, {}))
+    with pytest.raises(ResourceLoadingError):
+        ResourceBundle.from_bytes(
+            ResourceBundle._header.pack(ResourceBundle.magic, ResourceBundle.version, len(payload), 0)
+            + payload
+        )
@@ -0,0 +1,36 @@
+import tracemalloc
+from os import path as paths
+
+from library.events import EventDispatcher, EventId
+from library.model.game_driver import GameDriver
+
+
+def _model_blocks():
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(True, paths.join('*', 'library', 'model', '*'), all_frames=True),)
+    )
+    return sum(stat.count for stat in snapshot.statistics('filename'))
+
+
+def test_field_update_does_not_allocate(make_services, warmup_ticks=2000, ticks=500):
+    services = make_services(debug__is_god_mode=True)
+    event_dispatcher = services[EventDispatcher]
+    game_driver = GameDriver(services)
+    game_driver.new_game(GameDriver.Difficulty.NORMAL, 'classic', 0)
+    for time in range(400):
+        event_dispatcher.fire(EventId.TICK, None, time=time)
+    assert game_driver.mode == GameDriver.Mode.PLAY
+    field = game_driver.field
+    # warm up under tracing, so that actor state replaced at crossways is
+    # traced on both sides and the handlers are specialized by the interpreter
+    tracemalloc.start(16)
+    try:
+        for _ in range(warmup_ticks):
+            field.update()
+        before = _model_blocks()
+        for _ in range(ticks):
+            field.update()
+        after = _model_blocks()
+    finally:
+        tracemalloc.stop()
+    assert after <= before
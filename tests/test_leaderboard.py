@@ -0,0 +1,24 @@
+import threading
+
+from library.leaderboard import Leaderboard
+from library.resource_manager import ResourceManager
+
+
+def test_add_rating_off_main_thread(make_services, monkeypatch):
+    writers = []
+    add = Leaderboard.add
+
+    def record_add(leaderboard, *args):
+        writers.append(threading.current_thread())
+        add(leaderboard, *args)
+
+    monkeypatch.setattr(Leaderboard, 'add', record_add)
+    services = make_services()
+    resources = services[ResourceManager]
+    results = []
+    resources.add_rating('abc', 1200, 'classic', 'NORMAL', 2, results.append)
+    resources.add_rating('def', 900, 'classic', 'NORMAL', 1, results.append)
+    resources._io_worker.flush()
+    assert writers and threading.main_thread() not in writers
+    assert results == [None, None]
+    assert resources.get_rating_list() == [('abc', 1200), ('def', 900)]
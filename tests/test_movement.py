@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from library.controller import AbstractInputSource
+from library.events import EventDispatcher, EventId
+from library.model.control import InputUid
+from library.model.game_driver import GameDriver
+
+_directions = (InputUid.RIGHT, InputUid.UP, InputUid.LEFT, InputUid.DOWN)
+
+
+def _start(make_services, movement_model, grid, seed, god_mode):
+    services = make_services(
+        gameplay__movement_model=movement_model, debug__is_god_mode=god_mode
+    )
+    game_driver = GameDriver(services)
+    game_driver.new_game(GameDriver.Difficulty.NORMAL, grid, seed)
+    return services, game_driver
+
+
+@pytest.mark.parametrize('god_mode', (False, True))
+@pytest.mark.parametrize('grid', ('classic', 'custom'))
+@pytest.mark.parametrize('seed', (0, 1, 2))
+def test_fixed_movement_matches_float(make_services, seed, grid, god_mode, ticks=6000):
+    games = [
+        _start(make_services, movement_model, grid, seed, god_mode)
+        for movement_model in ('float', 'fixed')
+    ]
+    controls_random = random.Random(seed)
+    for time in range(ticks):
+        control = None
+        if controls_random.random() < 0.05:
+            control = controls_random.choice(_directions)
+        for services, _ in games:
+            if control is not None:
+                services[AbstractInputSource].press(control)
+            services[EventDispatcher].fire(EventId.TICK, None, time=time)
+        (_, float_game), (_, fixed_game) = games
+        assert float_game.mode == fixed_game.mode, time
+        assert float_game.scores == fixed_game.scores, time
+        if float_game.field is None:
+            continue
+        for name, actor in float_game.field.actors.items():
+            other = fixed_game.field.actors[name]
+            assert actor.position.x == pytest.approx(other.position.x, abs=1e-6), (time, name)
+            assert actor.position.y == pytest.approx(other.position.y, abs=1e-6), (time, name)
+            assert actor.direction == other.direction, (time, name)
+            assert actor.mode == other.mode, (time, name)
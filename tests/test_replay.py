@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from library.config import AbstractConfig
+from library.controller import AbstractInputSource
+from library.events import EventDispatcher, EventId
+from library.exceptions import ResourceLoadingError
+from library.model.control import InputUid
+from library.model.game_driver import GameDriver
+from library.replay import Replay, ReplayPlayer, ReplayRecorder
+from library.resource_manager import ResourceManager
+
+_directions = (InputUid.RIGHT, InputUid.UP, InputUid.LEFT, InputUid.DOWN)
+
+
+def _record(services, path, ticks=1500):
+    event_dispatcher = services[EventDispatcher]
+    input_source = services[AbstractInputSource]
+    ReplayRecorder(services, lambda: path)
+    game_driver = GameDriver(services)
+    game_driver.new_game(GameDriver.Difficulty.NORMAL, 'classic', 7)
+    controls_random = random.Random(7)
+    for time in range(ticks):
+        if controls_random.random() < 0.05:
+            input_source.press(controls_random.choice(_directions))
+        event_dispatcher.fire(EventId.TICK, None, time=time)
+    event_dispatcher.fire(EventId.DESTROY, None)
+    return Replay.read(path)
+
+
+def _play(services, replay):
+    event_dispatcher = services[EventDispatcher]
+    player = ReplayPlayer(services, GameDriver(services), replay)
+    time = 0
+    while not player.finished:
+        event_dispatcher.fire(EventId.TICK, None, time=time)
+        time += 1
+    return player
+
+
+def test_replay_records_rules(make_services, tmp_path):
+    replay = _record(make_services(), str(tmp_path / 'game.pmr'))
+    assert set(replay.rules) == {f'{section}.{key}' for section, key in Replay.rule_options}
+
+
+def test_replay_without_rule_is_rejected(make_services, tmp_path):
+    replay = _record(make_services(), str(tmp_path / 'game.pmr'))
+    del replay.rules['gameplay.dot_count']
+    with pytest.raises(ResourceLoadingError):
+        Replay.from_bytes(replay.to_bytes())
+
+
+def test_replay_applies_rules(make_services, tmp_path):
+    replay = _record(make_services(), str(tmp_path / 'game.pmr'))
+    services = make_services(gameplay__start_lives=1, debug__is_god_mode=True)
+    replay.apply_rules(services[AbstractConfig])
+    assert _play(services, replay).reproduced
+
+
+def test_replay_reports_config_mismatch(make_services, tmp_path, caplog):
+    replay = _record(make_services(), str(tmp_path / 'game.pmr'))
+    player = _play(make_services(gameplay__start_lives=1), replay)
+    assert player.reproduced is False
+    assert 'Replay config mismatch: gameplay.start_lives' in caplog.text
+    assert 'Replay diverged' not in caplog.text
+
+
+def test_replay_does_not_save(make_services, tmp_path):
+    replay = _record(make_services(), str(tmp_path / 'game.pmr'))
+    replay.controls.append((replay.length // 2, InputUid.SAVE))
+    replay.controls.sort(key=lambda control: control[0])
+    services = make_services()
+    assert _play(services, replay).reproduced
+    assert services[ResourceManager].get_save('quick') is None
@@ -0,0 +1,36 @@
+import pytest
+
+from library.events import EventDispatcher, EventId
+from library.model.game_driver import GameDriver
+from library.resource_manager import ResourceManager
+from library.save import SaveGame
+
+
+def test_save_large_grid(make_services):
+    services = make_services()
+    event_dispatcher = services[EventDispatcher]
+    game_driver = GameDriver(services)
+    game_driver.new_game(GameDriver.Difficulty.NORMAL, 'classic', 0)
+    for time in range(400):
+        event_dispatcher.fire(EventId.TICK, None, time=time)
+    game_driver.save_game('quick')
+    save = services[ResourceManager].get_save('quick')
+    # more cells than a 16-bit length can describe
+    save.snapshot.content = bytes(range(6)) * 20000
+    loaded = SaveGame.from_bytes(save.to_bytes())
+    for name in ('time', 'level', 'scores', 'lives', 'dots', 'random', 'content', 'actors'):
+        assert getattr(loaded.snapshot, name) == getattr(save.snapshot, name), name
+
+
+@pytest.mark.parametrize('seed', (None, 0, 0xFFFFFFFF))
+def test_save_seed_round_trip(make_services, seed):
+    services = make_services()
+    game_driver = GameDriver(services)
+    game_driver.new_game(GameDriver.Difficulty.NORMAL, 'classic', 0)
+    for time in range(300):
+        services[EventDispatcher].fire(EventId.TICK, None, time=time)
+    game_driver.save_game('quick')
+    save = services[ResourceManager].get_save('quick')
+    save.seed = seed
+    data = save.to_bytes()
+    assert SaveGame.from_bytes(data).seed == seed